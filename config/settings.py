@@ -193,6 +193,20 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+
+# Приём ставок через очередь (write-behind): купоны пишутся пачками, см. games/utils/bet_queue.py
+BET_QUEUE_ENABLED = os.getenv("BET_QUEUE_ENABLED", "False").lower() in ('true', '1', 'yes', 'y')
+
+# Источники случайности для результатов матчей по порядку (random_org, system, local), см. games/utils/entropy.py
+ENTROPY_BACKENDS = [name.strip() for name in os.getenv("ENTROPY_BACKENDS", "random_org,system").split(",") if name.strip()]
+ENTROPY_SEED = int(os.getenv("ENTROPY_SEED", "0"))  # для источника local
+RANDOM_ORG_API_KEY = os.getenv("RANDOM_ORG_API_KEY", "")  # без ключа random_org выпадает из цепочки
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -1,12 +1,14 @@
 from django.contrib import admin
-from django.db.models import Prefetch
+from django.utils.html import format_html_join
+from django.utils.safestring import mark_safe
 
-from games.models.bets import BetCoupon, BetVariant, SelectedOutcome
+from games.models.bets import BetCoupon, BetVariant
 from games.models.jackpot import Jackpot
 from games.models.matchs import Match
 from games.models.payout import PayoutCategory
 from games.models.rounds import Round, RoundStats
 from games.models.wins import BiggestWin
+from games.utils import outcome_codes
 
 
 @admin.register(PayoutCategory)
@@ -32,39 +34,44 @@ class JackpotAdmin(admin.ModelAdmin):
         # Запрещает удаление записей
         return False
 
-class SelectedOutcomeInline(admin.TabularInline):
-    model = SelectedOutcome
-    extra = 0
-    readonly_fields = ["match", "outcome", "result_icon"]
-    can_delete = False
-    show_change_link = False
-
-    def has_add_permission(self, request, obj=None):
-        return False
-
 @admin.register(BetVariant)
 class BetVariantAdmin(admin.ModelAdmin):
-    inlines = [SelectedOutcomeInline]
     list_display = ["id", "coupon_id", "matched_count", "win_amount", "is_win"]
     list_select_related = ["coupon", "coupon__user", "coupon__round"]
     list_per_page = 25
-
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        return qs.prefetch_related(
-            Prefetch(
-                "selected",
-                queryset=SelectedOutcome.objects.select_related(
-                    "match__team1",
-                    "match__team2",
-                    "match__round"
-                )
-            )
+    readonly_fields = ["selections"]
+
+    @admin.display(description="Исходы")
+    def selections(self, obj):
+        # исходы раскодируются из outcome_code, строк SelectedOutcome у новых вариантов нет
+        matches = list(outcome_codes.round_matches(obj.coupon.round_id).select_related("round", "team1", "team2"))
+        return format_html_join(
+            mark_safe("<br>"),
+            "{}: {} {}",
+            ((s.match, s.get_outcome_display(), s.result_icon()) for s in obj.get_selections(matches)),
         )
 
 class BetCouponAdmin(admin.ModelAdmin):
-    list_display = ["id", "user", "round", "amount_total", "num_variants", "created_at"]
-    readonly_fields = ["created_at"]
+    list_display = ["id", "user", "round", "amount_total", "num_variants", "is_system", "created_at"]
+    readonly_fields = ["created_at", "system_selections"]
+
+    @admin.display(boolean=True, description="Системный")
+    def is_system(self, obj):
+        return obj.is_system
+
+    @admin.display(description="Выбор системного купона")
+    def system_selections(self, obj):
+        if not obj.is_system:
+            return "—"
+        matches = list(outcome_codes.round_matches(obj.round_id).select_related("round", "team1", "team2"))
+        return format_html_join(
+            mark_safe("<br>"),
+            "{}: {}",
+            (
+                (m, ", ".join(outcome_codes.RESULT_BY_DIGIT[d].label for d in digits))
+                for m, digits in zip(matches, obj.get_choices())
+            ),
+        )
 
 admin.site.register(BetCoupon, BetCouponAdmin)
 
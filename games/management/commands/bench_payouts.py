@@ -0,0 +1,54 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from games.management.commands.services.settlement import (
+    bet_cents, settle_groups, settle_groups_decimal,
+)
+
+CATEGORY_PERCENTS = {6: 10, 7: 10, 8: 15, 9: 20, 10: 40}
+
+
+class Command(BaseCommand):
+    help = "Замер расчёта выигрышей: копейки (NumPy) против прежнего Decimal (сверка — в games/tests.py)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--groups", type=int, default=200_000, help="Число групп победителей")
+        parser.add_argument("--pool", type=int, default=10_000_000, help="Фонд выплат в копейках")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options["seed"])
+
+        # синтетические группы (купон, matched_count): ставка купона делится на варианты
+        matched, variants, bets = [], [], []
+        for _ in range(options["groups"]):
+            num_variants = rnd.choice((1, 2, 3, 4, 6, 8, 9, 12, 16, 18, 24, 27))
+            amount_cents = rnd.randint(10, 100_000)
+            matched.append(rnd.choice((6, 6, 6, 7, 7, 8, 9, 10)))
+            variants.append(rnd.randint(1, num_variants))
+            bets.append(bet_cents(amount_cents, num_variants))
+
+        category_bets = {
+            key: sum(b * n for m, n, b in zip(matched, variants, bets) if m >= key)
+            for key in CATEGORY_PERCENTS
+        }
+        category_prizes = {
+            key: options["pool"] * percent // 100
+            for key, percent in CATEGORY_PERCENTS.items()
+            if category_bets[key] > 0
+        }
+
+        started = time.perf_counter()
+        settle_groups(matched, variants, bets, category_prizes, category_bets)
+        numpy_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        settle_groups_decimal(matched, variants, bets, category_prizes, category_bets)
+        decimal_time = time.perf_counter() - started
+
+        self.stdout.write(
+            f"групп: {len(bets)}, decimal: {decimal_time:.3f} c, копейки: {numpy_time:.3f} c, "
+            f"ускорение: x{decimal_time / max(numpy_time, 1e-9):.1f}"
+        )
@@ -0,0 +1,117 @@
+import logging
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from games.management.commands.services.lifecycle import run_selection
+from games.management.commands.services.matches_count import ENGINES, ENGINE_SQL
+from games.management.commands.services.payouts import PAYOUT_CHUNK_SIZE
+from games.management.commands.services.results import prefetch_entropy
+from games.management.commands.services.round_generation import top_up_rounds, MAX_ROUNDS
+from games.management.commands.services.scheduler import MaintenanceWorker, SettlementWorker
+from games.models.rounds import Round
+from users.ledger import COMPACT_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+IDLE_INTERVAL = 5  # секунд ожидания, если нет раунда для игры
+
+
+class Command(BaseCommand):
+    help = (
+        "Игровой движок: один постоянный процесс вместо round_play.sh / generate_round.sh. "
+        "Окна приёма ставок идут друг за другом, расчёт раунда — в отдельном потоке; "
+        "досоздаёт будущие раунды и сжимает журнал баланса; SIGTERM/SIGINT — мягкая остановка"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--matched-count-engine",
+            choices=ENGINES,
+            default=ENGINE_SQL,
+            help="Чем пересчитывать matched_count: sql (UPDATE в БД) или numpy (таблица совпадений)",
+        )
+        parser.add_argument(
+            "--payout-chunk-size",
+            type=int,
+            default=PAYOUT_CHUNK_SIZE,
+            help="Сколько купонов обрабатывать за одну порцию выплат",
+        )
+        parser.add_argument("--max-rounds", type=int, default=MAX_ROUNDS, help="Сколько держать незавершённых раундов")
+        parser.add_argument(
+            "--compact-interval",
+            type=float,
+            default=COMPACT_INTERVAL,
+            help="Раз во сколько секунд переносить журнал баланса в balance_cached",
+        )
+
+    def handle(self, *args, **options):
+        stop_event = threading.Event()
+
+        def stop(signum, frame):
+            # приём ставок прерывается сразу (раунд продолжится при следующем запуске),
+            # уже закрытые раунды рассчитываются до конца
+            logger.info("Получен сигнал %s, останавливаем движок", signum)
+            stop_event.set()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        settlement = SettlementWorker(
+            engine=options["matched_count_engine"],
+            chunk_size=options["payout_chunk_size"],
+        )
+        settlement.start()
+        maintenance = MaintenanceWorker(interval=options["compact_interval"])
+        maintenance.start()
+
+        # выплаты не идемпотентны: раунд, остановленный на них, разбирается вручную
+        for round_id in Round.objects.filter(status=Round.Status.PAYOUT).values_list("id", flat=True):
+            logger.error("Раунд %s остановлен на выплатах, требуется ручная проверка", round_id)
+
+        # исходы для раундов без сида (созданных до цепочки сидов) — одним запросом, в фоне
+        prefetch_entropy()
+
+        # раунды с закрытым приёмом ставок (после перезапуска) — сразу в расчёт
+        for round_obj in Round.objects.filter(status=Round.Status.CALCULATION).order_by("id"):
+            settlement.submit(round_obj)
+
+        self.stdout.write("Движок запущен")
+        while not stop_event.is_set():
+            _ensure_connection()
+
+            created = top_up_rounds(options["max_rounds"])
+            if created:
+                logger.info("Создано раундов: %s", created)
+
+            round_obj = _next_round()
+            if round_obj is None:
+                stop_event.wait(IDLE_INTERVAL)
+                continue
+
+            if run_selection(round_obj, stop_event):
+                # следующий раунд открывается сразу, не дожидаясь выплат этого
+                settlement.submit(round_obj)
+
+        settlement.stop()
+        maintenance.stop()
+        self.stdout.write("Движок остановлен")
+
+
+def _next_round():
+    """
+    Раунд для приёма ставок: сначала прерванный (после перезапуска), затем следующий ожидающий.
+    Раунды в CALCULATION и PAYOUT принадлежат потоку расчёта.
+    """
+    return (
+        Round.objects.filter(status=Round.Status.SELECTION).order_by("id").first()
+        or Round.objects.filter(status=Round.Status.WAITING).order_by("id").first()
+    )
+
+
+def _ensure_connection():
+    # соединение переиспользуется между раундами; оборванное — переоткрывается
+    if connection.connection is not None and not connection.is_usable():
+        connection.close()
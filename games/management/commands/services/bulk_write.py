@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+from decimal import Decimal
+
+from django.db import connection, transaction
+
+MODE_SET = "set"
+MODE_ADD = "add"
+
+COPY_BUFFER_ROWS = 50_000
+
+
+def bulk_update_from_copy(model, key_fields, value_fields, rows, mode: str = MODE_SET) -> int:
+    """
+    Массовое обновление одной командой вместо bulk_update с CASE WHEN id=...:
+    строки заливаются через COPY во временную таблицу и применяются одним UPDATE ... FROM.
+
+    key_fields   — поля, по которым строка сопоставляется с записью (обычно ("id",)),
+    value_fields — обновляемые поля,
+    rows         — итерируемое кортежей (*ключи, *значения), может быть генератором,
+    mode         — "set": поле = значение, "add": поле = поле + значение (дельты балансов).
+
+    Возвращает число обновлённых записей.
+    """
+    key_fields = tuple(key_fields)
+    value_fields = tuple(value_fields)
+    columns = [model._meta.get_field(name) for name in key_fields + value_fields]
+
+    table = model._meta.db_table
+    temp_table = f"tmp_{table}_update"
+    qn = connection.ops.quote_name
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE {qn(temp_table)} ({', '.join(_column_sql(f) for f in columns)})"
+        )
+
+        copied = 0
+        column_list = ", ".join(qn(f.column) for f in columns)
+        for chunk in _csv_chunks(rows):
+            cursor.copy_expert(f"COPY {qn(temp_table)} ({column_list}) FROM STDIN WITH (FORMAT csv)", chunk)
+            copied += 1
+        if not copied:
+            cursor.execute(f"DROP TABLE {qn(temp_table)}")
+            return 0
+
+        assignments = []
+        for name in value_fields:
+            column = qn(model._meta.get_field(name).column)
+            if mode == MODE_ADD:
+                assignments.append(f"{column} = m.{column} + t.{column}")
+            else:
+                assignments.append(f"{column} = t.{column}")
+        join = " AND ".join(
+            f"m.{qn(model._meta.get_field(name).column)} = t.{qn(model._meta.get_field(name).column)}"
+            for name in key_fields
+        )
+
+        cursor.execute(f"ANALYZE {qn(temp_table)}")
+        cursor.execute(
+            f"UPDATE {qn(table)} AS m SET {', '.join(assignments)} FROM {qn(temp_table)} AS t WHERE {join}"
+        )
+        updated = cursor.rowcount
+        cursor.execute(f"DROP TABLE {qn(temp_table)}")
+        return updated
+
+
+def copy_insert(model, fields, rows) -> int:
+    """
+    Массовая вставка через COPY без создания экземпляров модели.
+    rows — итерируемое кортежей значений fields (может быть генератором);
+    остальные поля (кроме pk) заполняются значениями по умолчанию модели.
+    id вставленных строк не возвращаются. Возвращает число вставленных строк.
+    """
+    fields = [model._meta.get_field(name) for name in fields]
+    rest = [
+        f for f in model._meta.concrete_fields
+        if not f.primary_key and f not in fields
+    ]
+    defaults = tuple(f.get_default() for f in rest)
+
+    qn = connection.ops.quote_name
+    column_list = ", ".join(qn(f.column) for f in fields + rest)
+    inserted = 0
+    with connection.cursor() as cursor:
+        for chunk in _csv_chunks(row + defaults for row in rows):
+            cursor.copy_expert(
+                f"COPY {qn(model._meta.db_table)} ({column_list}) FROM STDIN WITH (FORMAT csv)", chunk
+            )
+            inserted += cursor.rowcount
+    return inserted
+
+
+def _column_sql(field) -> str:
+    # тип колонки временной таблицы = тип поля модели (для FK — тип ключа)
+    return f"{connection.ops.quote_name(field.column)} {field.db_type(connection)}"
+
+
+def _csv_chunks(rows):
+    """CSV-буферы для COPY по COPY_BUFFER_ROWS строк: None -> NULL, dict/list -> JSON."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        count += 1
+        if count == COPY_BUFFER_ROWS:
+            buffer.seek(0)
+            yield buffer
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            count = 0
+    if count:
+        buffer.seek(0)
+        yield buffer
+
+
+def _csv_value(value):
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, Decimal):
+        return format(value, "f")
+    return value
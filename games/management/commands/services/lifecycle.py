@@ -0,0 +1,91 @@
+import logging
+import time
+from contextlib import contextmanager
+
+from games.management.commands.services.matches_count import recompute_matched_counts, ENGINE_SQL
+from games.management.commands.services.payouts import process_payouts, PAYOUT_CHUNK_SIZE
+from games.management.commands.services.results import generate_results_for_round
+from games.management.commands.services.rounds import (
+    start_selection, wait_selection, close_selection, finish_intake,
+)
+from games.models.rounds import Round
+
+logger = logging.getLogger(__name__)
+
+
+class PhaseTimer:
+    """Длительность фаз раунда в секундах; сохраняется в Round.phase_timings."""
+
+    def __init__(self, round_obj):
+        self.round_obj = round_obj
+        self.timings = dict(round_obj.phase_timings or {})
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(time.perf_counter() - started, 3)
+
+    def save(self):
+        self.round_obj.phase_timings = self.timings
+        Round.objects.filter(id=self.round_obj.id).update(phase_timings=self.timings)
+
+
+def run_selection(round_obj, stop_event=None) -> bool:
+    """
+    Стадия ставок до selection_end_time, затем закрытие приёма (раунд в CALCULATION).
+    Раунд, прерванный на приёме ставок (SELECTION), продолжается с оставшегося времени.
+    Возвращает False, если stop_event прервал приём ставок (раунд остаётся в SELECTION).
+    """
+    timer = PhaseTimer(round_obj)
+    with timer.phase("selection"):
+        if round_obj.status == Round.Status.WAITING:
+            finished = start_selection(round_obj, stop_event)
+        elif round_obj.status == Round.Status.SELECTION:
+            finished = wait_selection(round_obj, stop_event)
+        else:
+            return True
+    if not finished:
+        return False
+
+    close_selection(round_obj)
+    timer.save()
+    return True
+
+
+def settle_round(round_obj, engine: str = ENGINE_SQL, chunk_size: int = PAYOUT_CHUNK_SIZE):
+    """
+    Расчёт раунда с закрытым приёмом ставок (CALCULATION):
+    запись принятых ставок -> результаты -> matched_count -> выплаты и финализация.
+    """
+    timer = PhaseTimer(round_obj)
+    with timer.phase("intake"):
+        finish_intake(round_obj)
+    with timer.phase("results"):
+        generate_results_for_round(round_obj)
+    with timer.phase("matched_count"):
+        recompute_matched_counts(round_obj, engine=engine)
+    with timer.phase("payouts"):
+        process_payouts(round_obj, chunk_size=chunk_size)
+
+    # сколько прошло от закрытия приёма ставок до конца выплат
+    if round_obj.selection_end_time and round_obj.end_time:
+        timer.timings["settlement_lag"] = round(
+            (round_obj.end_time - round_obj.selection_end_time).total_seconds(), 3
+        )
+    timer.save()
+    logger.info("Раунд %s рассчитан: %s", round_obj.id, timer.timings)
+
+
+def play_round(round_obj, engine: str = ENGINE_SQL, chunk_size: int = PAYOUT_CHUNK_SIZE, stop_event=None) -> bool:
+    """
+    Полный цикл раунда по порядку: приём ставок -> калькуляция и результаты -> matched_count -> выплаты.
+    Раунд в CALCULATION продолжается с расчёта.
+    Возвращает False, если stop_event прервал приём ставок (раунд остаётся в SELECTION).
+    """
+    if not run_selection(round_obj, stop_event):
+        return False
+    settle_round(round_obj, engine=engine, chunk_size=chunk_size)
+    return True
@@ -1,40 +1,105 @@
-from django.db.models import Q, Count
-from games.models.bets import BetVariant, SelectedOutcome
-from games.models.matchs import Match
-
-def recompute_matched_counts(round_obj):
-    # Все варианты в раунде
-    variant_ids = list(
-        BetVariant.objects.filter(coupon__round=round_obj).values_list("id", flat=True)
+from array import array
+
+import numpy as np
+from django.db.models import Case, When, Value, F, IntegerField
+from django.db.models.functions import Mod
+from django.db.models.lookups import Exact
+
+from games.management.commands.services.bulk_write import bulk_update_from_copy
+from games.models.bets import BetCoupon, BetVariant
+from games.utils import outcome_codes
+
+ENGINE_SQL = "sql"
+ENGINE_NUMPY = "numpy"
+ENGINES = (ENGINE_SQL, ENGINE_NUMPY)
+
+STREAM_CHUNK_SIZE = 20_000
+
+
+def recompute_matched_counts(round_obj, engine: str = ENGINE_SQL):
+    """
+    Пересчитывает matched_count вариантов раунда и гистограммы системных купонов.
+    engine="sql" — один UPDATE с разбором кода в БД,
+    engine="numpy" — таблица совпадений на все 3**10 кодов + векторная выборка.
+    """
+    results = outcome_codes.result_digits(
+        list(outcome_codes.round_matches(round_obj.id).values_list("result", flat=True))
     )
-    if not variant_ids:
-        return
 
-    # Обнулим matched_count одним апдейтом (для тех, у кого не будет совпадений)
-    BetVariant.objects.filter(id__in=variant_ids).update(matched_count=0)
-
-    # Посчитаем количество угаданных исходов на вариант:
-    # selected outcome совпадает с фактическим результатом матча
-    matched_rows = (
-        SelectedOutcome.objects
-        .filter(variant_id__in=variant_ids)
-        .filter(
-            (Q(outcome=SelectedOutcome.Outcome.WIN1) & Q(match__result=Match.Outcome.WIN_1)) |
-            (Q(outcome=SelectedOutcome.Outcome.DRAW) & Q(match__result=Match.Outcome.DRAW)) |
-            (Q(outcome=SelectedOutcome.Outcome.WIN2) & Q(match__result=Match.Outcome.WIN_2))
+    if engine == ENGINE_NUMPY:
+        _recompute_numpy(round_obj, results)
+    else:
+        _recompute_sql(round_obj, results)
+
+    recompute_matched_histograms(round_obj, results)
+
+
+def _recompute_sql(round_obj, results):
+    # matched_count = сумма совпавших разрядов outcome_code с результатами матчей.
+    # Считается прямо в БД одним UPDATE, без чтения вариантов в Python.
+    matched = Value(0)
+    for idx, expected in enumerate(results):
+        if expected is None:
+            continue
+        digit = Mod(F("outcome_code") / Value(3 ** idx), Value(3))
+        matched = matched + Case(
+            When(Exact(digit, expected), then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
         )
-        .values("variant_id")
-        .annotate(cnt=Count("id"))
+
+    BetVariant.objects.filter(coupon__round=round_obj).update(matched_count=matched)
+
+
+def matched_count_table(results) -> np.ndarray:
+    """matched_count для каждого возможного кода варианта: table[code]."""
+    codes = np.arange(3 ** len(results), dtype=np.int32)
+    table = np.zeros(codes.shape, dtype=np.int16)
+    for idx, expected in enumerate(results):
+        if expected is not None:
+            table += (codes // 3 ** idx) % 3 == expected
+    return table
+
+
+def _recompute_numpy(round_obj, results):
+    table = matched_count_table(results)
+
+    # коды вариантов раунда одним потоковым запросом
+    ids = array("q")
+    codes = array("q")
+    rows = (
+        BetVariant.objects
+        .filter(coupon__round=round_obj)
+        .values_list("id", "outcome_code")
+        .iterator(chunk_size=STREAM_CHUNK_SIZE)
     )
+    for variant_id, code in rows:
+        ids.append(variant_id)
+        codes.append(-1 if code is None else code)
+    if not ids:
+        return
+
+    codes_np = np.frombuffer(codes, dtype=np.int64)
+    matched = np.where(codes_np >= 0, table[np.clip(codes_np, 0, None)], 0)
 
-    # Массовое обновление matched_count только там, где cnt > 0
-    variants_map = {v.id: v for v in BetVariant.objects.filter(id__in=variant_ids).only("id", "matched_count")}
-    to_update = []
-    for row in matched_rows:
-        v = variants_map.get(row["variant_id"])
-        if v:
-            v.matched_count = row["cnt"]
-            to_update.append(v)
-
-    if to_update:
-        BetVariant.objects.bulk_update(to_update, ["matched_count"])
+    # запись через COPY во временную таблицу и один UPDATE ... FROM
+    bulk_update_from_copy(BetVariant, ["id"], ["matched_count"], zip(ids, matched.tolist()))
+
+
+def recompute_matched_histograms(round_obj, results):
+    """
+    Гистограмма {matched_count: число вариантов} для системных купонов раунда.
+    Считается свёрткой по матчам (outcome_codes.matched_histogram), варианты не перебираются.
+    """
+    coupons = list(
+        BetCoupon.objects
+        .filter(round=round_obj, selection_mask__isnull=False)
+        .only("id", "selection_mask")
+    )
+    for coupon in coupons:
+        hist = outcome_codes.matched_histogram(coupon.get_choices(), results)
+        coupon.matched_histogram = {str(k): n for k, n in enumerate(hist) if n}
+
+    bulk_update_from_copy(
+        BetCoupon, ["id"], ["matched_histogram"], ((c.id, c.matched_histogram) for c in coupons)
+    )
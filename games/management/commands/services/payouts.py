@@ -1,24 +1,44 @@
+from array import array
 from datetime import timedelta
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal
 from collections import defaultdict
 
+import numpy as np
 from django.utils import timezone
-from django.db.models import Sum
+from django.db.models import Count
 
+from games.management.commands.services.bulk_write import bulk_update_from_copy
+from games.management.commands.services.settlement import (
+    CENTS, bet_cents, cents_to_decimal, settle_groups, to_cents,
+)
 from games.models.bets import BetVariant, BetCoupon
 from games.models.jackpot import Jackpot
 from games.models.payout import PayoutCategory
 from games.models.rounds import Round, RoundStats
 from games.models.wins import BiggestWin
+from games.utils import live_pool, outcome_codes, round_events
+from users import ledger
+from users.models import BalanceEntry
 
 HOUSE_FEE = Decimal("0.05")  # комиссия 5%
 
+PAYOUT_CHUNK_SIZE = 5_000  # купонов в одной порции выплат
 
-def process_payouts(round_obj: Round):
+
+def process_payouts(round_obj: Round, chunk_size: int = PAYOUT_CHUNK_SIZE):
     """
     Выплаты и финализация раунда.
     Обновляет варианты, балансы и пишет RoundStats.
+
+    Победители читаются группами (купон, matched_count) порциями по chunk_size купонов
+    (keyset по id, см. _iter_winner_chunks), поэтому память не растёт с размером раунда:
+    1-й проход — суммы ставок по числу совпадений (11 ячеек),
+    2-й проход — выигрыши групп, результаты порции сразу пишутся в БД.
+    Между порциями хранится только лучший купон каждого пользователя.
+    Деньги в расчёте — целые копейки (см. settlement.py), Decimal — только при записи.
     """
+    # ставки, зафиксированные после старта калькуляции, тоже попадают в пул
+    live_pool.flush_pool(round_obj.id)
     round_obj.refresh_from_db()
 
     jackpot = _get_or_create_jackpot()
@@ -44,143 +64,149 @@ def process_payouts(round_obj: Round):
     # ===== PAYOUT =====
     round_obj.status = Round.Status.PAYOUT
     round_obj.save(update_fields=["status"])
+    round_events.notify(round_obj)
 
-    count_winners_by_category = {str(c.matched_count): 0 for c in categories}
-    payout_by_category_dec = {str(c.matched_count): Decimal("0.00") for c in categories}
+    keys = [c.matched_count for c in categories]
 
-    variant_acc = {}  # pk -> {"win_sum": Decimal, "bet": Decimal, "is_win": bool}
-    coupon_map = defaultdict(Decimal)  # coupon_id -> сумма выигрыша
-    user_balance_delta = defaultdict(Decimal)
-    total_win = Decimal("0.00")
-
-    for key in [c.matched_count for c in categories]:
-        variants_qs = (
-            BetVariant.objects
-            .filter(coupon__round=round_obj, matched_count__gte=key)
-            .exclude(matched_count__lt=min_cat)
-            .select_related("coupon", "coupon__user")
-        )
+    # ===== 1-й проход: число победителей и сумма ставок (копейки) по числу совпадений
+    winners_by_matched = [0] * (outcome_codes.MATCHES_PER_ROUND + 1)
+    bets_by_matched = [0] * (outcome_codes.MATCHES_PER_ROUND + 1)
+    for groups in _iter_winner_chunks(round_obj, min_cat, chunk_size):
+        for _, _, _, matched, variants, bet in groups:
+            winners_by_matched[matched] += variants
+            bets_by_matched[matched] += bet * variants
 
-        winners_count = variants_qs.count()
-        count_winners_by_category[str(key)] = winners_count
+    count_winners_by_category = {str(key): sum(winners_by_matched[key:]) for key in keys}
+    category_bets = {key: sum(bets_by_matched[key:]) for key in keys}
 
-        if winners_count == 0:
+    # призы категорий: без победителей фонд уходит в джекпот, старшая категория забирает джекпот
+    category_prizes = {}
+    for key in keys:
+        if count_winners_by_category[str(key)] == 0:
             jackpot.amount = (jackpot.amount + category_funds[key]).quantize(Decimal("0.01"))
             jackpot.save(update_fields=["amount"])
             continue
 
-        coupon_bet_cache: dict[int, Decimal] = {}
-        variant_bets = []
-        total_variant_bets = Decimal("0.00")
-
-        for v in variants_qs:
-            cid = v.coupon_id
-            bet_amount = coupon_bet_cache.get(cid)
-            if bet_amount is None:
-                try:
-                    bet_amount = (v.coupon.amount_total / v.coupon.num_variants).quantize(Decimal("0.01"))
-                except Exception:
-                    bet_amount = Decimal("0.00")
-                coupon_bet_cache[cid] = bet_amount
-
-            variant_bets.append((v, bet_amount))
-            total_variant_bets += bet_amount
-
         category_prize = category_funds[key]
         if key == max_cat:
             category_prize = (category_prize + jackpot.amount).quantize(Decimal("0.01"))
             jackpot.amount = Decimal("0.00")
             jackpot.save(update_fields=["amount"])
 
-        if total_variant_bets <= 0:
-            continue
+        if category_bets[key] > 0:
+            category_prizes[key] = to_cents(category_prize)
+
+    # ===== 2-й проход: выигрыш одного варианта каждой группы = сумма долей по категориям (settle_groups)
+    payout_by_category_c = {key: 0 for key in keys}
+    total_win_c = 0
+    max_variant_win_c = 0
+    best_multiplier_c = (0, 0)  # (множитель в сотых, выигрыш в копейках)
+    biggest_win_c = (0, 0)  # (выигрыш в копейках, множитель в сотых)
+
+    # лучший купон пользователя: user_id -> слот в массивах (сумма в копейках, id купона)
+    user_slots = {}
+    best_cents = array("q")
+    best_coupon = array("q")
+
+    if category_prizes:
+        # по умолчанию купон не выиграл и считается «уведомлённым»
+        BetCoupon.objects.filter(round=round_obj).update(
+            win_amount_total=Decimal("0.00"), is_winner=False, is_seen=True, variant_wins={}
+        )
+        min_prize_key = min(category_prizes)
 
-        for v, bet_amount in variant_bets:
-            share = (bet_amount / total_variant_bets)
-            payout = (category_prize * share).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        for groups in _iter_winner_chunks(round_obj, min_cat, chunk_size):
+            data = np.array(groups, dtype=np.int64).reshape(-1, 6)
+            data = data[data[:, 3] >= min_prize_key]
+            if not len(data):
+                continue
+            coupon_ids, user_ids, is_system, matched, variants, bets = data.T
 
-            acc = variant_acc.setdefault(
-                v.pk, {"win_sum": Decimal("0.00"), "bet": bet_amount, "is_win": False}
+            wins, multipliers, by_category = settle_groups(
+                matched, variants, bets, category_prizes, category_bets
             )
-            acc["win_sum"] = (acc["win_sum"] + payout).quantize(Decimal("0.01"))
-            acc["is_win"] = True
-
-            user_balance_delta[v.coupon.user_id] += payout
-            total_win += payout
-            payout_by_category_dec[str(key)] = (payout_by_category_dec[str(key)] + payout).quantize(Decimal("0.01"))
-
-            # >>> ДОБАВЛЯЕМ В КУПОН <<<
-            coupon_acc = coupon_map.setdefault(v.coupon_id, Decimal("0.00"))
-            coupon_acc += payout
-            coupon_map[v.coupon_id] = coupon_acc
-
-    # ===== обновление вариантов
-    if variant_acc:
-        variant_ids = list(variant_acc.keys())
-        variant_map = {
-            v.pk: v for v in BetVariant.objects.filter(pk__in=variant_ids).select_related("coupon")
-        }
-
-        best_multiplier = {"x": 0.00, "sum": 0.00}
-        biggest_win = {"sum": 0.00, "x": 0.00}
-
-        for pk, acc in variant_acc.items():
-            v = variant_map[pk]
-            v.win_amount = (v.win_amount + acc["win_sum"]).quantize(Decimal("0.01"))
-            v.is_win = acc["is_win"]
-
-            bet_amount = acc["bet"]
-            v.win_multiplier = (
-                (v.win_amount / bet_amount).quantize(Decimal("0.01")) if bet_amount > 0 else Decimal("0.00")
+            for key, paid in by_category.items():
+                payout_by_category_c[key] += paid
+
+            group_wins = wins * variants
+            total_win_c += int(group_wins.sum())
+            max_variant_win_c = max(max_variant_win_c, int(wins.max()))
+
+            # первый максимум в порядке групп, как при проходе по одной
+            i = int(np.argmax(multipliers))
+            if multipliers[i] > best_multiplier_c[0]:
+                best_multiplier_c = (int(multipliers[i]), int(wins[i]))
+            i = int(np.argmax(wins))
+            if wins[i] > biggest_win_c[0]:
+                biggest_win_c = (int(wins[i]), int(multipliers[i]))
+
+            # суммы по купонам и пользователям порции
+            chunk_coupons, coupon_index = np.unique(coupon_ids, return_inverse=True)
+            coupon_totals = np.zeros(len(chunk_coupons), dtype=np.int64)
+            np.add.at(coupon_totals, coupon_index, group_wins)
+            coupon_users = np.zeros(len(chunk_coupons), dtype=np.int64)
+            coupon_users[coupon_index] = user_ids
+
+            chunk_users, user_index = np.unique(user_ids, return_inverse=True)
+            user_totals = np.zeros(len(chunk_users), dtype=np.int64)
+            np.add.at(user_totals, user_index, group_wins)
+
+            # лучший купон каждого юзера (купоны идут по возрастанию id)
+            for coupon_id, user_id, cents in zip(
+                chunk_coupons.tolist(), coupon_users.tolist(), coupon_totals.tolist()
+            ):
+                if cents <= 0:
+                    continue
+                slot = user_slots.get(user_id)
+                if slot is None:
+                    user_slots[user_id] = len(best_cents)
+                    best_cents.append(cents)
+                    best_coupon.append(coupon_id)
+                elif cents > best_cents[slot]:
+                    best_cents[slot] = cents
+                    best_coupon[slot] = coupon_id
+
+            # ===== граница сохранения: копейки -> Decimal
+            variant_wins = defaultdict(dict)  # coupon_id -> {matched_count: {...}} для системных купонов
+            variant_rows = []  # (coupon_id, matched_count, win_amount, win_multiplier, is_win) для строк BetVariant
+            for coupon_id, system, m, n, win, mult in zip(
+                coupon_ids.tolist(), is_system.tolist(), matched.tolist(), variants.tolist(),
+                wins.tolist(), multipliers.tolist(),
+            ):
+                if system:
+                    variant_wins[coupon_id][str(m)] = {
+                        "variants": n,
+                        "win_amount": str(cents_to_decimal(win)),
+                        "win_multiplier": str(cents_to_decimal(mult)),
+                    }
+                else:
+                    variant_rows.append((coupon_id, m, cents_to_decimal(win), cents_to_decimal(mult), True))
+
+            _flush_chunk(
+                round_obj,
+                variant_rows,
+                (
+                    (coupon_id, cents_to_decimal(cents), True, variant_wins.get(coupon_id, {}))
+                    for coupon_id, cents in zip(chunk_coupons.tolist(), coupon_totals.tolist())
+                    if cents > 0
+                ),
+                (
+                    (user_id, cents_to_decimal(cents))
+                    for user_id, cents in zip(chunk_users.tolist(), user_totals.tolist())
+                ),
             )
 
-            win_amount_f = float(v.win_amount)
-            win_mult_f = float(v.win_multiplier)
-
-            if win_mult_f > best_multiplier["x"]:
-                best_multiplier = {"x": win_mult_f, "sum": win_amount_f}
-            if win_amount_f > biggest_win["sum"]:
-                biggest_win = {"sum": win_amount_f, "x": win_mult_f}
-
-        BetVariant.objects.bulk_update(variant_map.values(), ["win_amount", "win_multiplier", "is_win"])
-
-        # получаем все купоны раунда
-        coupons = list(BetCoupon.objects.filter(round=round_obj))
-
-        # обновляем win_amount_total, is_winner
-        for c in coupons:
-            total = coupon_map.get(c.id, Decimal("0.00"))
-            c.win_amount_total = total.quantize(Decimal("0.01"))
-            c.is_winner = total > 0
-            c.is_seen = True  # по умолчанию считаем «уведомлённым»
-
-        # находим лучший купон для каждого юзера
-        best_by_user = {}
-        for c in coupons:
-            if not c.is_winner:
-                continue
-            if c.user_id not in best_by_user or c.win_amount_total > best_by_user[c.user_id].win_amount_total:
-                best_by_user[c.user_id] = c
-
         # отмечаем лучший купон у каждого юзера как «не просмотренный»
-        for c in best_by_user.values():
-            c.is_seen = False
+        if best_coupon:
+            BetCoupon.objects.filter(id__in=list(best_coupon)).update(is_seen=False)
 
-        # массово сохраняем
-        BetCoupon.objects.bulk_update(coupons, ["win_amount_total", "is_winner", "is_seen"])
-
-    else:
-        best_multiplier = {"x": 0.00, "sum": 0.00}
-        biggest_win = {"sum": 0.00, "x": 0.00}
+    total_win = cents_to_decimal(total_win_c)
+    max_variant_win = cents_to_decimal(max_variant_win_c)
+    best_multiplier = {"x": best_multiplier_c[0] / CENTS, "sum": best_multiplier_c[1] / CENTS}
+    biggest_win = {"sum": biggest_win_c[0] / CENTS, "x": biggest_win_c[1] / CENTS}
 
     # ===== обновление глобального рекорда BiggestWin (жизнь 7 дней)
-    # Берём максимум из итоговых сумм выигрыша по вариантам (Decimal), а не из float в biggest_win
-    max_variant_win = Decimal("0.00")
-    for acc in variant_acc.values():
-        if acc["win_sum"] > max_variant_win:
-            max_variant_win = acc["win_sum"]
-    max_variant_win = max_variant_win.quantize(Decimal("0.01"))
-
+    # Берём максимум из итоговых сумм выигрыша по вариантам (копейки), а не из float в biggest_win
     if max_variant_win > Decimal("0.00"):
         obj, created = BiggestWin.objects.get_or_create(id=1, defaults={"amount": max_variant_win})
         if not created:
@@ -189,21 +215,12 @@ def process_payouts(round_obj: Round):
                 obj.amount = max_variant_win
                 obj.save(update_fields=["amount"])
 
-    # ===== обновление балансов пользователей
-    if user_balance_delta:
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-        users = list(User.objects.filter(id__in=user_balance_delta.keys()).only("id", "balance_cached"))
-        for u in users:
-            u.balance_cached = (u.balance_cached + user_balance_delta[u.id]).quantize(Decimal("0.01"))
-        User.objects.bulk_update(users, ["balance_cached"])
-
     # ===== FINISH =====
     round_obj.status = Round.Status.FINISHED
     round_obj.end_time = timezone.now()
     round_obj.save(update_fields=["status", "end_time"])
 
-    payout_by_category = {k: float(v) for k, v in payout_by_category_dec.items()}
+    payout_by_category = {str(k): v / CENTS for k, v in payout_by_category_c.items()}
 
     RoundStats.objects.create(
         round=round_obj,
@@ -217,6 +234,66 @@ def process_payouts(round_obj: Round):
         best_multiplier=best_multiplier,
         biggest_win=biggest_win,
     )
+    # раунд завершён, джекпот обновлён
+    round_events.notify(round_obj)
+
+
+def _flush_chunk(round_obj, variant_rows, coupon_rows, balance_rows):
+    """Запись результатов порции: строки вариантов, выигравшие купоны, выигрыши в журнал баланса."""
+    # строки вариантов обновляются группами (купон, matched_count) одним UPDATE ... FROM
+    bulk_update_from_copy(
+        BetVariant, ["coupon", "matched_count"], ["win_amount", "win_multiplier", "is_win"], variant_rows
+    )
+    bulk_update_from_copy(BetCoupon, ["id"], ["win_amount_total", "is_winner", "variant_wins"], coupon_rows)
+    # выигрыши — записи в журнал баланса, balance_cached не читается и не перезаписывается
+    ledger.add_entries(balance_rows, BalanceEntry.Reason.PAYOUT, round_id=round_obj.id)
+
+
+def _iter_winner_chunks(round_obj: Round, min_matched: int, chunk_size: int):
+    """
+    Победители раунда группами (купон, matched_count) порциями по chunk_size купонов:
+    у всех вариантов группы одна ставка и один выигрыш. Купоны идут keyset-порциями по id,
+    строки BetVariant агрегируются одним запросом на порцию, системные купоны
+    берутся из гистограммы совпадений. Группы порции упорядочены по (купон, matched_count):
+    кортежи (coupon_id, user_id, is_system, matched_count, variants, ставка варианта в копейках).
+    """
+    last_id = 0
+    while True:
+        coupons = list(
+            BetCoupon.objects
+            .filter(round=round_obj, id__gt=last_id)
+            .only("id", "user_id", "amount_total", "num_variants", "selection_mask", "matched_histogram")
+            .order_by("id")[:chunk_size]
+        )
+        if not coupons:
+            return
+        last_id = coupons[-1].id
+
+        row_counts = defaultdict(list)  # coupon_id -> [(matched_count, variants)]
+        row_coupon_ids = [c.id for c in coupons if not c.is_system]
+        if row_coupon_ids:
+            rows = (
+                BetVariant.objects
+                .filter(coupon_id__in=row_coupon_ids, matched_count__gte=min_matched)
+                .values("coupon_id", "matched_count")
+                .annotate(variants=Count("id"))
+                .order_by("coupon_id", "matched_count")
+                .iterator()
+            )
+            for row in rows:
+                row_counts[row["coupon_id"]].append((row["matched_count"], row["variants"]))
+
+        groups = []
+        for coupon in coupons:
+            if coupon.is_system:
+                counts = sorted((int(k), n) for k, n in coupon.matched_histogram.items())
+            else:
+                counts = row_counts.get(coupon.id, ())
+            bet = bet_cents(to_cents(coupon.amount_total), coupon.num_variants)
+            for matched, variants in counts:
+                if matched >= min_matched:
+                    groups.append((coupon.id, coupon.user_id, coupon.is_system, matched, variants, bet))
+        yield groups
 
 
 def _get_or_create_jackpot():
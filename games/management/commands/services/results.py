@@ -1,59 +1,55 @@
-import time
-import httpx
-import random
-from typing import List
-from games.models.matchs import Match
-
-RND_ENDPOINT = "https://api.random.org/json-rpc/4/invoke"
-API_KEY = "39e0d208-742b-4c71-828e-5d59f4b19c1b"
-
+import logging
 
-class RandomOrgError(RuntimeError):
-    pass
+from django.db.models import Q
 
+from games.models.matchs import Match
+from games.models.rounds import Round
+from games.utils import entropy, fairness
 
-def _random_org_call(method: str, params: dict) -> List[int]:
-    payload = {
-        "jsonrpc": "2.0",
-        "method": method,
-        "params": {"apiKey": API_KEY, **params},
-        "id": int(time.time() * 1000),
-    }
-    with httpx.Client(timeout=10) as client:
-        resp = client.post(RND_ENDPOINT, json=payload)
-        resp.raise_for_status()
-        data = resp.json()
-
-    if "error" in data:
-        raise RandomOrgError(data["error"])
-    return data["result"]["random"]["data"]
-
+logger = logging.getLogger(__name__)
 
-def _rnd_generate_results(n: int) -> List[str]:
-    values = _random_org_call("generateIntegers", {"n": n, "min": 1, "max": 3, "replacement": True})
-    mapping = {1: Match.Outcome.WIN_1, 2: Match.Outcome.DRAW, 3: Match.Outcome.WIN_2}
-    return [mapping[v] for v in values]
+OUTCOMES = {1: Match.Outcome.WIN_1, 2: Match.Outcome.DRAW, 3: Match.Outcome.WIN_2}
 
 
 def generate_results_for_round(round_obj, force_outcome: str | None = None):
     """
     Ставит результаты всем матчам раунда.
     Если force_outcome указан — проставляет его во все матчи.
+    Исходы раскрываются из server_seed раунда (games/utils/fairness.py); у раундов без сида
+    (созданных до цепочки сидов) — берутся из буфера случайности (games/utils/entropy.py).
     """
-    matches = list(Match.objects.filter(round=round_obj))
+    matches = list(Match.objects.filter(round=round_obj).order_by("id"))
     if not matches:
         return
 
     if force_outcome:
         # статический результат для тестов
         results = [force_outcome for _ in matches]
+    elif round_obj.server_seed:
+        results = fairness.round_outcomes(round_obj.server_seed, round_obj.id, len(matches))
     else:
-        try:
-            results = _rnd_generate_results(len(matches))
-        except Exception:
-            results = [random.choice([Match.Outcome.WIN_1, Match.Outcome.DRAW, Match.Outcome.WIN_2]) for _ in matches]
+        results = [OUTCOMES[v] for v in entropy.get_pool().take(len(matches))]
 
     for m, r in zip(matches, results):
         m.result = r
     Match.objects.bulk_update(matches, ["result"])
 
+
+def prefetch_entropy(wait: bool = False) -> int:
+    """
+    Заранее запрашивает исходы для всех ещё не сыгранных матчей раундов без сида —
+    одним запросом к цепочке источников, чтобы расчёт не уходил в запасной источник.
+    Раунды с сидом (все новые) случайность из буфера не берут. Возвращает число запрошенных исходов.
+    """
+    need = (
+        Match.objects
+        .filter(Q(round__server_seed__isnull=True) | Q(round__server_seed=""), result__isnull=True)
+        .exclude(round__status=Round.Status.FINISHED)
+        .count()
+    )
+    if need:
+        try:
+            entropy.get_pool().prefetch(need, wait=wait)
+        except entropy.EntropyError:
+            logger.exception("Не удалось заранее получить случайность для %s матчей", need)
+    return need
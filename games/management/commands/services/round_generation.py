@@ -0,0 +1,82 @@
+from django.db import connection, transaction
+
+from games.models.matchs import Match
+from games.models.rounds import Round
+from games.utils import fairness
+from teams.models.teams import Team
+
+MAX_ROUNDS = 8
+MATCHES_PER_ROUND = 10
+
+# Пространство ключей pg_advisory_xact_lock: раунды досоздаёт один генератор за раз
+ROUND_GENERATION_LOCK = 7302
+
+
+def top_up_rounds(max_rounds: int = MAX_ROUNDS) -> int:
+    """
+    Досоздаёт будущие раунды с матчами, чтобы незавершённых было max_rounds.
+    Возвращает число созданных раундов (0 — хватает, или мало активных команд).
+
+    Раунды и матчи всех раундов пишутся двумя INSERT (id раундов возвращает RETURNING),
+    поэтому глубокий запас из сотен раундов создаётся так же дёшево, как один.
+    """
+    with transaction.atomic():
+        # параллельный генератор (движок и generate_rounds) ждёт и пересчитывает недостачу
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s, 0)", [ROUND_GENERATION_LOCK])
+
+        future_cnt = Round.objects.exclude(status=Round.Status.FINISHED).count()
+        need = max(0, max_rounds - future_cnt)
+        if need == 0:
+            return 0
+
+        teams = list(Team.objects.filter(is_active=True).order_by("id"))
+        if len(teams) < MATCHES_PER_ROUND * 2:
+            return 0
+
+        created_rounds = Round.objects.bulk_create([Round(status=Round.Status.WAITING) for _ in range(need)])
+
+        Match.objects.bulk_create([
+            Match(round=round_obj, team1=team1, team2=team2)
+            for round_obj in created_rounds
+            for team1, team2 in round_pairs(teams, round_obj.id)
+        ])
+
+        # результаты раундов фиксируются сразу: сид из цепочки, обязательство — в game_hash
+        fairness.assign_seeds(created_rounds)
+    return need
+
+
+def round_pairs(teams: list, round_id: int) -> list:
+    """
+    Пары раунда по круговой системе (circle method): раунд round_id играет тур
+    round_id mod (число туров) круга, поэтому в любых (число туров) раундах подряд
+    пары не повторяются, в том числе на стыке кругов.
+    Если в туре пар больше MATCHES_PER_ROUND, берётся их окно со сдвигом от круга к кругу,
+    чтобы со временем сыграли все пары.
+    """
+    n = len(teams) + len(teams) % 2  # нечётное число команд — с «пустой» командой
+    days = n - 1
+    cycle, day = divmod(round_id, days)
+
+    order = list(teams)
+    if len(order) < n:
+        order.append(None)
+
+    pairs = [
+        (home, away) if day % 2 == 0 else (away, home)
+        for home, away in _circle_day(order, day)
+        if home is not None and away is not None
+    ]
+    offset = (cycle * MATCHES_PER_ROUND) % len(pairs)
+    pairs = pairs[offset:] + pairs[:offset]
+    return pairs[:MATCHES_PER_ROUND]
+
+
+def _circle_day(order: list, day: int) -> list:
+    # первая команда на месте, остальные сдвигаются по кругу на day позиций
+    rest = order[1:]
+    shift = day % len(rest)
+    arranged = [order[0]] + rest[shift:] + rest[:shift]
+    n = len(arranged)
+    return [(arranged[i], arranged[n - 1 - i]) for i in range(n // 2)]
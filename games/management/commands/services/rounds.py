@@ -1,23 +1,60 @@
 import time
 from django.utils import timezone
 from games.models.rounds import Round
+from games.utils import bet_queue, live_pool, round_events
 
 
 SELECTION_DURATION = 180  # секунд
 
 
-def start_selection(round_obj):
+def start_selection(round_obj, stop_event=None):
     now = timezone.now()
     round_obj.status = Round.Status.SELECTION
     round_obj.start_time = now
     round_obj.selection_end_time = now + timezone.timedelta(seconds=SELECTION_DURATION)
     round_obj.save(update_fields=["status", "start_time", "selection_end_time"])
+    round_events.notify(round_obj)
 
-    sleep_seconds = max(0, int((round_obj.selection_end_time - timezone.now()).total_seconds()))
-    if sleep_seconds:
+    live_pool.create_shards(round_obj.id)
+
+    return wait_selection(round_obj, stop_event)
+
+
+def wait_selection(round_obj, stop_event=None) -> bool:
+    """
+    Ждёт конца приёма ставок (selection_end_time). stop_event (threading.Event) прерывает
+    ожидание — тогда возвращает False, раунд остаётся в SELECTION.
+    Round.live_pool во время приёма не пишется: UPDATE строки раунда ждал бы все транзакции
+    ставок (FOR SHARE в lock_round_for_bets), а новые ставки — его. Живой пул читается
+    из шардов, итоговый фиксирует finish_intake.
+    """
+    # дробные секунды: приём закрывается ровно по selection_end_time, без округления
+    sleep_seconds = max(0.0, (round_obj.selection_end_time - timezone.now()).total_seconds())
+    if stop_event is None:
         time.sleep(sleep_seconds)
+        return True
+    return not stop_event.wait(sleep_seconds)
 
 
 def start_calculation(round_obj):
+    close_selection(round_obj)
+    finish_intake(round_obj)
+
+
+def close_selection(round_obj):
+    """Закрывает приём ставок: раунд переходит в CALCULATION."""
     round_obj.status = Round.Status.CALCULATION
     round_obj.save(update_fields=["status"])
+    round_events.notify(round_obj)
+
+
+def finish_intake(round_obj):
+    """
+    Дожидается записи принятых ставок и фиксирует итоговый пул (можно вызывать повторно).
+    Очередь дописывается после смены статуса (close_selection), ожидание ограничено —
+    см. games/utils/bet_queue.py.
+    """
+    # новые ставки уже не принимаются; ждём, пока очередь приёма запишет принятые
+    bet_queue.wait_drained(round_obj.id)
+    # итоговый пул для выплат
+    live_pool.flush_pool(round_obj.id)
@@ -0,0 +1,99 @@
+"""
+Конвейер раундов: приём ставок следующего раунда не ждёт расчёта предыдущего.
+
+Главный поток ведёт окна приёма ставок друг за другом (run_selection), а раунд с закрытым
+приёмом отдаёт в поток расчёта (settle_round). Поток расчёта один: раунды рассчитываются
+строго по порядку, джекпот и рекорды выигрышей не пишутся параллельно.
+Отдельный поток обслуживания (MaintenanceWorker) периодически сжимает журнал баланса, чтобы
+баланс пользователя считался по снимку и короткому хвосту записей, и удаляет просроченные
+Idempotency-Key.
+"""
+import logging
+import queue
+import threading
+
+from django.db import connection
+
+from games.management.commands.services.lifecycle import settle_round
+from games.management.commands.services.matches_count import ENGINE_SQL
+from games.management.commands.services.payouts import PAYOUT_CHUNK_SIZE
+from games.utils import idempotency
+from users.ledger import COMPACT_INTERVAL, compact_balances
+
+logger = logging.getLogger(__name__)
+
+# сигнал потоку расчёта закончить работу после уже поставленных раундов
+_STOP = object()
+
+
+class SettlementWorker:
+    def __init__(self, engine: str = ENGINE_SQL, chunk_size: int = PAYOUT_CHUNK_SIZE):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="settlement", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def submit(self, round_obj):
+        backlog = self._queue.qsize()
+        if backlog:
+            # расчёт не успевает за окнами приёма ставок
+            logger.warning("Раунд %s ждёт расчёта, в очереди ещё %s", round_obj.id, backlog)
+        self._queue.put(round_obj)
+
+    def stop(self):
+        """Дожидается расчёта всех поставленных раундов."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while True:
+                round_obj = self._queue.get()
+                if round_obj is _STOP:
+                    return
+                try:
+                    settle_round(round_obj, engine=self.engine, chunk_size=self.chunk_size)
+                except Exception:
+                    # раунд остаётся в CALCULATION/PAYOUT, движок подхватит его после перезапуска
+                    logger.exception("Не удалось рассчитать раунд %s", round_obj.id)
+                    if connection.connection is not None and not connection.is_usable():
+                        connection.close()
+        finally:
+            # у потока своё соединение с БД
+            connection.close()
+
+
+class MaintenanceWorker:
+    """
+    Раз в interval секунд переносит журнал баланса в balance_cached (users.ledger.compact_balances)
+    и удаляет просроченные Idempotency-Key (games.utils.idempotency.purge_expired).
+    """
+
+    def __init__(self, interval: float = COMPACT_INTERVAL):
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="maintenance", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stop_event.wait(self.interval):
+                # задачи независимы: ошибка одной не откладывает другую, обе повторятся следующим проходом
+                for task in (compact_balances, idempotency.purge_expired):
+                    try:
+                        task()
+                    except Exception:
+                        logger.exception("Ошибка обслуживания: %s", task.__name__)
+                        if connection.connection is not None and not connection.is_usable():
+                            connection.close()
+        finally:
+            connection.close()
@@ -0,0 +1,108 @@
+"""
+Расчёт выигрышей групп победителей в целых копейках (int64, NumPy).
+
+Правила округления (совпадают с прежним расчётом на Decimal):
+- ставка одного варианта: amount_total / num_variants до копейки, половина — к чётному;
+- выплата за категорию: prize * bet / category_bet до копейки, половина — вверх
+  (считается точной дробью в целых числах, без промежуточной доли share);
+- множитель: win / bet до сотых, половина — к чётному.
+Decimal появляется только при записи в БД (cents_to_decimal).
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+
+CENTS = 100
+
+
+def to_cents(amount: Decimal) -> int:
+    """Decimal с точностью до копейки -> целые копейки."""
+    return int(amount.quantize(Decimal("0.01")) * CENTS)
+
+
+def cents_to_decimal(cents: int) -> Decimal:
+    return (Decimal(int(cents)) / CENTS).quantize(Decimal("0.01"))
+
+
+def bet_cents(amount_total_cents: int, num_variants: int) -> int:
+    """Ставка одного варианта в копейках, половина — к чётному."""
+    if num_variants <= 0:
+        return 0
+    q, r = divmod(amount_total_cents, num_variants)
+    if 2 * r > num_variants or (2 * r == num_variants and q % 2):
+        q += 1
+    return q
+
+
+def settle_groups(matched, variants, bets, category_prizes: dict, category_bets: dict):
+    """
+    Выигрыш одного варианта каждой группы (купон, matched_count).
+
+    matched, variants, bets — массивы групп: число совпадений, число вариантов, ставка (копейки);
+    category_prizes — {категория: приз в копейках} (только категории с победителями),
+    category_bets    — {категория: сумма ставок победителей категории в копейках}.
+
+    Возвращает (wins, multipliers, payout_by_category): выигрыш варианта в копейках,
+    множитель в сотых, {категория: выплачено по категории в копейках}.
+    """
+    matched = np.asarray(matched, dtype=np.int64)
+    variants = np.asarray(variants, dtype=np.int64)
+    bets = np.asarray(bets, dtype=np.int64)
+
+    wins = np.zeros(bets.shape, dtype=np.int64)
+    payout_by_category = {}
+
+    # разных ставок мало: выплата считается на уникальную ставку точно (int Python), затем gather
+    unique_bets, bet_index = np.unique(bets, return_inverse=True)
+    for key, prize in category_prizes.items():
+        total = category_bets[key]
+        per_bet = np.array(
+            [(2 * prize * int(bet) + total) // (2 * total) for bet in unique_bets],
+            dtype=np.int64,
+        )
+        payouts = np.where(matched >= key, per_bet[bet_index], 0)
+        wins += payouts
+        payout_by_category[key] = int((payouts * variants).sum())
+
+    multipliers = _div_half_even(wins * CENTS, bets)
+    return wins, multipliers, payout_by_category
+
+
+def settle_groups_decimal(matched, variants, bets, category_prizes: dict, category_bets: dict):
+    """
+    Прежний расчёт на Decimal — эталон для сверки (games/tests.py) и замера (bench_payouts).
+    Аргументы и результат — те же, что у settle_groups, в копейках.
+    """
+    prizes = {key: cents_to_decimal(prize) for key, prize in category_prizes.items()}
+    totals = {key: cents_to_decimal(total) for key, total in category_bets.items()}
+
+    wins, multipliers = [], []
+    payout_by_category = {key: Decimal("0.00") for key in category_prizes}
+    payout_cache = {}  # (категория, ставка) -> выплата одному варианту
+    for m, n, bet_c in zip(matched, variants, bets):
+        bet = cents_to_decimal(bet_c)
+        win_sum = Decimal("0.00")
+        for key, category_prize in prizes.items():
+            if m < key:
+                continue
+            payout = payout_cache.get((key, bet))
+            if payout is None:
+                share = (bet / totals[key])
+                payout = (category_prize * share).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+                payout_cache[(key, bet)] = payout
+            win_sum = (win_sum + payout).quantize(Decimal("0.01"))
+            payout_by_category[key] = (payout_by_category[key] + payout * n).quantize(Decimal("0.01"))
+
+        win_multiplier = (win_sum / bet).quantize(Decimal("0.01")) if bet > 0 else Decimal("0.00")
+        wins.append(to_cents(win_sum))
+        multipliers.append(to_cents(win_multiplier))
+
+    return wins, multipliers, {key: to_cents(v) for key, v in payout_by_category.items()}
+
+
+def _div_half_even(num, den):
+    # целочисленное деление с округлением половины к чётному; при den == 0 -> 0
+    safe_den = np.where(den > 0, den, 1)
+    q, r = np.divmod(num, safe_den)
+    q += (2 * r > safe_den) | ((2 * r == safe_den) & (q % 2 == 1))
+    return np.where(den > 0, q, 0)
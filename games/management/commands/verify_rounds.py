@@ -0,0 +1,69 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from games.models.matchs import Match
+from games.models.rounds import Round
+from games.utils import fairness
+
+
+class Command(BaseCommand):
+    help = (
+        "Аудит доказуемо честных результатов: заново выводит результаты завершённых раундов "
+        "из раскрытых сидов и сверяет с game_hash, цепочкой сидов и результатами матчей"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from-id", type=int, default=None, help="С какого раунда (включительно)")
+        parser.add_argument("--to-id", type=int, default=None, help="По какой раунд (включительно)")
+
+    def handle(self, *args, **options):
+        rounds = Round.objects.filter(status=Round.Status.FINISHED, server_seed__isnull=False)
+        if options["from_id"] is not None:
+            rounds = rounds.filter(id__gte=options["from_id"])
+        if options["to_id"] is not None:
+            rounds = rounds.filter(id__lte=options["to_id"])
+        rounds = list(
+            rounds
+            .order_by("seed_chain_id", "seed_index")
+            .values("id", "server_seed", "game_hash", "seed_chain_id", "seed_index")
+        )
+        if not rounds:
+            self.stdout.write("Нет завершённых раундов с сидами")
+            return
+
+        # результаты всех раундов — одним запросом, по порядку id матчей
+        results = defaultdict(list)
+        matches = (
+            Match.objects
+            .filter(round_id__in=[r["id"] for r in rounds])
+            .order_by("round_id", "id")
+            .values_list("round_id", "result")
+        )
+        for round_id, result in matches:
+            results[round_id].append(result)
+
+        errors = []
+        prev = None
+        for r in rounds:
+            seed = r["server_seed"]
+            if fairness.sha256_hex(seed) != r["game_hash"]:
+                errors.append(f"раунд {r['id']}: sha256(server_seed) != game_hash")
+
+            # раунды одной цепочки: сид, захэшированный на разницу номеров, даёт сид предыдущего
+            if prev and prev["seed_chain_id"] == r["seed_chain_id"]:
+                steps = r["seed_index"] - prev["seed_index"]
+                if steps <= 0 or fairness.hash_times(seed, steps) != prev["server_seed"]:
+                    errors.append(f"раунд {r['id']}: сид не продолжает цепочку раунда {prev['id']}")
+
+            actual = results.get(r["id"], [])
+            expected = fairness.round_outcomes(seed, r["id"], len(actual))
+            if actual != expected:
+                errors.append(f"раунд {r['id']}: результаты {''.join(map(str, actual))}, из сида {''.join(expected)}")
+            prev = r
+
+        for error in errors:
+            self.stdout.write(error)
+        if errors:
+            raise CommandError(f"Расхождений: {len(errors)} (проверено раундов: {len(rounds)})")
+        self.stdout.write(f"Проверено раундов: {len(rounds)}, расхождений нет")
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2025-09-12 14:20
+
+from django.db import migrations, models
+
+
+# Заполняем outcome_code у существующих вариантов из их строк SelectedOutcome:
+# разряд = позиция матча в раунде (по возрастанию id), цифра 0/1/2 = win1/draw/win2.
+BACKFILL_OUTCOME_CODE = """
+UPDATE games_betvariant v
+SET outcome_code = s.code
+FROM (
+    SELECT so.variant_id,
+           SUM(
+               (CASE so.outcome WHEN 'win1' THEN 0 WHEN 'draw' THEN 1 ELSE 2 END)
+               * (3 ^ m.idx)::integer
+           ) AS code
+    FROM games_selectedoutcome so
+    JOIN (
+        SELECT id, ROW_NUMBER() OVER (PARTITION BY round_id ORDER BY id) - 1 AS idx
+        FROM games_match
+    ) m ON m.id = so.match_id
+    GROUP BY so.variant_id
+) s
+WHERE s.variant_id = v.id
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0005_betcoupon_is_seen_betcoupon_is_winner_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='betvariant',
+            name='outcome_code',
+            field=models.PositiveIntegerField(blank=True, help_text='Исходы по всем матчам раунда, упакованные в троичный код (см. games.utils.outcome_codes)', null=True),
+        ),
+        migrations.RunSQL(BACKFILL_OUTCOME_CODE, migrations.RunSQL.noop),
+    ]
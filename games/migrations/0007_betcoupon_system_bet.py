@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2025-09-15 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0006_betvariant_outcome_code'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='betcoupon',
+            name='selection_mask',
+            field=models.PositiveIntegerField(blank=True, help_text='Системная ставка: выбор по матчам (3 бита на матч), варианты в БД не хранятся', null=True),
+        ),
+        migrations.AddField(
+            model_name='betcoupon',
+            name='variant_wins',
+            field=models.JSONField(blank=True, default=dict, help_text='Системная ставка: выигрыш одного варианта по числу совпадений {matched_count: {variants, win_amount, win_multiplier}}'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2025-09-16 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0007_betcoupon_system_bet'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='betcoupon',
+            name='matched_histogram',
+            field=models.JSONField(blank=True, default=dict, help_text='Системная ставка: число вариантов по числу совпадений {matched_count: variants}'),
+        ),
+    ]
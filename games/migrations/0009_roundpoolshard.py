@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2025-09-18 12:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0008_betcoupon_matched_histogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoundPoolShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pool_shards', to='games.round')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('round', 'shard'), name='round_pool_shard_uniq')],
+            },
+        ),
+        # текущие пулы раундов переносятся в шард 0
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO games_roundpoolshard (round_id, shard, amount)
+                SELECT id, 0, live_pool FROM games_round WHERE live_pool <> 0
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2025-09-20 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0009_roundpoolshard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='round',
+            name='phase_timings',
+            field=models.JSONField(blank=True, default=dict, help_text='Длительность фаз раунда в секундах (пишет движок, см. services/lifecycle.py)'),
+        ),
+    ]
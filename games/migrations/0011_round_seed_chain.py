@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2025-09-21 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0010_round_phase_timings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeedChain',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('secret', models.CharField(max_length=64)),
+                ('length', models.PositiveIntegerField()),
+                ('next_index', models.PositiveIntegerField(default=0, help_text='Сколько сидов уже выдано раундам')),
+                ('terminal_hash', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='round',
+            name='seed_index',
+            field=models.PositiveIntegerField(blank=True, help_text='Номер сида в цепочке', null=True),
+        ),
+        migrations.AddField(
+            model_name='round',
+            name='server_seed',
+            field=models.CharField(blank=True, help_text='Сид результатов раунда, раскрывается после завершения (games/utils/fairness.py)', max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name='round',
+            name='game_hash',
+            field=models.CharField(blank=True, help_text='Обязательство: sha256(server_seed), публикуется до начала раунда', max_length=128, null=True),
+        ),
+        migrations.AddField(
+            model_name='round',
+            name='seed_chain',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='rounds', to='games.seedchain'),
+        ),
+    ]
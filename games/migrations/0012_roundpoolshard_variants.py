@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2025-09-22 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0011_round_seed_chain'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roundpoolshard',
+            name='variants',
+            field=models.PositiveBigIntegerField(default=0, help_text='Число вариантов принятых купонов'),
+        ),
+        # число вариантов уже принятых купонов переносится в шард 0
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO games_roundpoolshard (round_id, shard, amount, variants)
+                SELECT round_id, 0, 0, SUM(num_variants) FROM games_betcoupon GROUP BY round_id
+                ON CONFLICT (round_id, shard) DO UPDATE SET variants = EXCLUDED.variants
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.core.management import call_command
+from django.db import migrations
+
+
+# таблица кэша "idempotency" (settings.CACHES, django.core.cache.backends.db.DatabaseCache)
+CACHE_TABLE = "idempotency_cache"
+
+
+def create_cache_table(apps, schema_editor):
+    call_command("createcachetable", CACHE_TABLE, database=schema_editor.connection.alias, verbosity=0)
+
+
+def drop_cache_table(apps, schema_editor):
+    schema_editor.execute(f"DROP TABLE IF EXISTS {schema_editor.quote_name(CACHE_TABLE)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0012_roundpoolshard_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, drop_cache_table),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.core.management import call_command
+from django.db import migrations, models
+
+# прежнее хранилище ключей — таблица DatabaseCache из 0013
+CACHE_TABLE = "idempotency_cache"
+
+
+def drop_cache_table(apps, schema_editor):
+    schema_editor.execute(f"DROP TABLE IF EXISTS {schema_editor.quote_name(CACHE_TABLE)}")
+
+
+def create_cache_table(apps, schema_editor):
+    call_command("createcachetable", CACHE_TABLE, database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0013_idempotency_cache'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=32)),
+                ('key', models.CharField(help_text='sha256 заголовка Idempotency-Key', max_length=64)),
+                ('fingerprint', models.CharField(help_text='sha256 тела запроса', max_length=64)),
+                ('response', models.JSONField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'scope', 'key'), name='uniq_idempotency_key')],
+            },
+        ),
+        migrations.RunPython(drop_cache_table, create_cache_table),
+    ]
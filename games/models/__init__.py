@@ -0,0 +1 @@
+from .idempotency import IdempotencyKey
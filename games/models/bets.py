@@ -5,6 +5,7 @@ from django.contrib.auth import get_user_model
 
 from games.models.matchs import Match
 from games.models.rounds import Round
+from games.utils import outcome_codes
 
 User = get_user_model()
 
@@ -15,6 +16,22 @@ class BetCoupon(models.Model):
     amount_total = models.DecimalField(max_digits=10, decimal_places=2)
     win_amount_total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     num_variants = models.PositiveIntegerField()
+    selection_mask = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Системная ставка: выбор по матчам (3 бита на матч), варианты в БД не хранятся"
+    )
+    matched_histogram = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Системная ставка: число вариантов по числу совпадений {matched_count: variants}"
+    )
+    variant_wins = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Системная ставка: выигрыш одного варианта по числу совпадений "
+                  "{matched_count: {variants, win_amount, win_multiplier}}"
+    )
     is_seen = models.BooleanField(default=True)
     is_winner = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -29,6 +46,35 @@ class BetCoupon(models.Model):
         except (ZeroDivisionError, DivisionByZero):
             return Decimal("0.00")
 
+    @property
+    def is_system(self) -> bool:
+        return self.selection_mask is not None
+
+    def get_choices(self):
+        """Выбор по матчам системного купона (цифры outcome_codes)."""
+        return outcome_codes.unpack_mask(self.selection_mask)
+
+    def iter_variants(self, results=None):
+        """
+        Варианты купона: строки BetVariant или, для системного купона,
+        лениво восстановленные VirtualVariant.
+        results — цифры результатов матчей раунда (outcome_codes.result_digits).
+        """
+        if not self.is_system:
+            yield from self.variants.all()
+            return
+        if results is None:
+            results = outcome_codes.result_digits(
+                list(outcome_codes.round_matches(self.round_id).values_list("result", flat=True))
+            )
+        for code in outcome_codes.iter_codes(self.get_choices()):
+            yield VirtualVariant(self, code, outcome_codes.matched_count(code, results))
+
+    def get_variant(self, index, results):
+        """index-й вариант системного купона (в порядке iter_variants)."""
+        code = outcome_codes.nth_code(self.get_choices(), index)
+        return VirtualVariant(self, code, outcome_codes.matched_count(code, results))
+
     class Meta:
         indexes = [
             # Быстрые выборки последних купонов пользователя
@@ -40,6 +86,11 @@ class BetCoupon(models.Model):
 
 class BetVariant(models.Model):
     coupon = models.ForeignKey(BetCoupon, related_name="variants", on_delete=models.CASCADE)
+    outcome_code = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Исходы по всем матчам раунда, упакованные в троичный код (см. games.utils.outcome_codes)"
+    )
     matched_count = models.PositiveSmallIntegerField(default=0)
     win_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     win_multiplier = models.DecimalField(max_digits=10, decimal_places=2, default=0)
@@ -49,22 +100,17 @@ class BetVariant(models.Model):
         return f"Вариант купона {self.coupon.id} #{self.id} ({self.matched_count} совпадений)"
 
     def calculate_matched_count(self):
-        outcome_mapping = {
-            SelectedOutcome.Outcome.WIN1: Match.Outcome.WIN_1,
-            SelectedOutcome.Outcome.DRAW: Match.Outcome.DRAW,
-            SelectedOutcome.Outcome.WIN2: Match.Outcome.WIN_2,
-        }
-        matched = 0
-        outcomes = self.selected.select_related('match').all()
-
-        for outcome in outcomes:
-            selected = outcome.outcome
-            expected = outcome_mapping.get(selected)
-            actual = outcome.match.result
-
-            if actual and expected == actual:
-                matched += 1
-        return matched
+        if self.outcome_code is None:
+            return 0
+        results = outcome_codes.round_matches(self.coupon.round_id).values_list("result", flat=True)
+        return outcome_codes.matched_count(self.outcome_code, outcome_codes.result_digits(list(results)))
+
+    def get_selections(self, matches):
+        """
+        Выбор варианта в виде (несохранённых) SelectedOutcome — строки в БД больше не пишутся.
+        matches — матчи раунда в порядке кодирования (outcome_codes.round_matches).
+        """
+        return _decode_selections(self.outcome_code, matches, variant=self)
 
     class Meta:
         indexes = [
@@ -75,6 +121,42 @@ class BetVariant(models.Model):
         ]
 
 
+class VirtualVariant:
+    """
+    Вариант системного купона. В БД не хранится: код берётся из маски купона,
+    выигрыш — из BetCoupon.variant_wins по числу совпадений.
+    """
+    id = pk = None
+
+    def __init__(self, coupon: BetCoupon, outcome_code: int, matched_count: int = 0):
+        self.coupon = coupon
+        self.coupon_id = coupon.id
+        self.outcome_code = outcome_code
+        self.matched_count = matched_count
+
+    def __str__(self):
+        return f"Вариант системного купона {self.coupon_id} ({self.matched_count} совпадений)"
+
+    @property
+    def _win(self) -> dict:
+        return self.coupon.variant_wins.get(str(self.matched_count), {})
+
+    @property
+    def win_amount(self) -> Decimal:
+        return Decimal(self._win.get("win_amount", "0.00"))
+
+    @property
+    def win_multiplier(self) -> Decimal:
+        return Decimal(self._win.get("win_multiplier", "0.00"))
+
+    @property
+    def is_win(self) -> bool:
+        return self.win_amount > 0
+
+    def get_selections(self, matches):
+        return _decode_selections(self.outcome_code, matches)
+
+
 class SelectedOutcome(models.Model):
     variant = models.ForeignKey(BetVariant, related_name='selected', on_delete=models.CASCADE)
     match = models.ForeignKey(Match, on_delete=models.CASCADE)
@@ -107,4 +189,22 @@ class SelectedOutcome(models.Model):
         constraints = [
             # Страховка от дублей: один матч на вариант — один раз
             models.UniqueConstraint(fields=["variant", "match"], name="uniq_variant_match"),
-        ]
\ No newline at end of file
+        ]
+
+
+# Порядок совпадает с цифрами outcome_codes: 0 — победа 1, 1 — ничья, 2 — победа 2
+OUTCOME_BY_DIGIT = (
+    SelectedOutcome.Outcome.WIN1,
+    SelectedOutcome.Outcome.DRAW,
+    SelectedOutcome.Outcome.WIN2,
+)
+
+
+def _decode_selections(outcome_code, matches, variant=None):
+    if outcome_code is None:
+        return []
+    digits = outcome_codes.decode(outcome_code, len(matches))
+    return [
+        SelectedOutcome(variant=variant, match=match, outcome=OUTCOME_BY_DIGIT[digit])
+        for match, digit in zip(matches, digits)
+    ]
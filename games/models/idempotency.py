@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.db import models
+
+
+class IdempotencyKey(models.Model):
+    """
+    Idempotency-Key запроса ставки и сохранённый ответ (games/utils/idempotency.py).
+    Пока запрос выполняется, response пуст, а expires_at — короткая метка «выполняется».
+    Просроченные ключи удаляет движок (MaintenanceWorker), живые не вытесняются.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    scope = models.CharField(max_length=32)
+    key = models.CharField(max_length=64, help_text="sha256 заголовка Idempotency-Key")
+    fingerprint = models.CharField(max_length=64, help_text="sha256 тела запроса")
+    response = models.JSONField(null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Idempotency-Key {self.scope} (user={self.user_id})"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "scope", "key"], name="uniq_idempotency_key"),
+        ]
@@ -23,7 +23,31 @@ class Round(models.Model):
         choices=Status.choices,
         default=Status.SELECTION
     )
-    game_hash = models.CharField(max_length=128, blank=True, null=True)
+    game_hash = models.CharField(
+        max_length=128,
+        blank=True,
+        null=True,
+        help_text="Обязательство: sha256(server_seed), публикуется до начала раунда"
+    )
+    server_seed = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        help_text="Сид результатов раунда, раскрывается после завершения (games/utils/fairness.py)"
+    )
+    seed_chain = models.ForeignKey(
+        "SeedChain",
+        on_delete=models.PROTECT,
+        related_name="rounds",
+        null=True,
+        blank=True,
+    )
+    seed_index = models.PositiveIntegerField(null=True, blank=True, help_text="Номер сида в цепочке")
+    phase_timings = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Длительность фаз раунда в секундах (пишет движок, см. services/lifecycle.py)"
+    )
 
     def __str__(self):
         return f"Раунд {self.id}"
@@ -54,3 +78,41 @@ class RoundStats(models.Model):
 
     def __str__(self):
         return f"Статистика раунда {self.round.id}"
+
+
+class RoundPoolShard(models.Model):
+    """
+    Шард живого пула раунда: купоны прибавляют ставку и число вариантов к случайному шарду
+    (UPDATE ... F() + x), поэтому параллельные ставки не упираются в одну строку Round.
+    Пул раунда = сумма шардов, в Round.live_pool она переносится после закрытия приёма ставок
+    (games.utils.live_pool.flush_pool).
+    """
+    round = models.ForeignKey(Round, on_delete=models.CASCADE, related_name="pool_shards")
+    shard = models.PositiveSmallIntegerField()
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    variants = models.PositiveBigIntegerField(default=0, help_text="Число вариантов принятых купонов")
+
+    def __str__(self):
+        return f"Пул раунда {self.round_id}, шард {self.shard}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["round", "shard"], name="round_pool_shard_uniq"),
+        ]
+
+
+class SeedChain(models.Model):
+    """
+    Цепочка хэшей для сидов раундов: h[0] = secret, h[i+1] = sha256(h[i]).
+    Раунды получают сиды с конца цепочки (h[length-1], h[length-2], ...), поэтому
+    sha256 сида раунда равен сиду предыдущего раунда цепочки, а terminal_hash = h[length]
+    заранее фиксирует все сиды цепочки.
+    """
+    secret = models.CharField(max_length=64)
+    length = models.PositiveIntegerField()
+    next_index = models.PositiveIntegerField(default=0, help_text="Сколько сидов уже выдано раундам")
+    terminal_hash = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Цепочка сидов {self.id} ({self.next_index}/{self.length})"
@@ -68,11 +68,15 @@ class RoundSerializer(serializers.ModelSerializer):
             "live_pool",
             "start_time",
             "selection_end_time",
+            "game_hash",
             "matches",
             "jackpot",
         ]
 
     def get_jackpot(self, obj):
+        # снимок текущего раунда передаёт джекпот, уже прочитанный вместе с версией
+        if "jackpot" in self.context:
+            return self.context["jackpot"]
         from games.models.jackpot import Jackpot
         jp = Jackpot.objects.first()
         return jp.amount if jp else None
@@ -172,7 +176,7 @@ class SelectedOutcomeSerializer(serializers.ModelSerializer):
 
 class UserBetVariantSerializer(serializers.ModelSerializer):
     bet_amount = serializers.SerializerMethodField()
-    selections = SelectedOutcomeSerializer(source="selected", many=True, read_only=True)
+    selections = serializers.SerializerMethodField()
 
     class Meta:
         model = BetVariant
@@ -189,4 +193,8 @@ class UserBetVariantSerializer(serializers.ModelSerializer):
     def get_bet_amount(self, obj: BetVariant):
         # ставка на вариант из купона (amount_total / num_variants)
         # свойство уже есть в BetCoupon.bet_amount
-        return obj.coupon.bet_amount
\ No newline at end of file
+        return obj.coupon.bet_amount
+
+    def get_selections(self, obj: BetVariant):
+        # исходы раскодируются из outcome_code по матчам раунда из контекста
+        return SelectedOutcomeSerializer(obj.get_selections(self.context["round_matches"]), many=True).data
\ No newline at end of file
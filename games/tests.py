@@ -1,3 +1,216 @@
-from django.test import TestCase
+import math
+import random
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from games.management.commands.services.settlement import (
+    bet_cents, settle_groups, settle_groups_decimal,
+)
+from games.utils import fairness, outcome_codes
+
+CATEGORY_PERCENTS = {6: 10, 7: 10, 8: 15, 9: 20, 10: 40}
+
+
+class SettlementParityTests(SimpleTestCase):
+    """Расчёт выигрышей в копейках (settle_groups) против прежнего Decimal (settle_groups_decimal)."""
+
+    def settle_both(self, matched, variants, bets, pool_cents):
+        category_bets = {
+            key: sum(b * n for m, n, b in zip(matched, variants, bets) if m >= key)
+            for key in CATEGORY_PERCENTS
+        }
+        category_prizes = {
+            key: pool_cents * percent // 100
+            for key, percent in CATEGORY_PERCENTS.items()
+            if category_bets[key] > 0
+        }
+        wins, multipliers, by_category = settle_groups(matched, variants, bets, category_prizes, category_bets)
+        ref_wins, ref_multipliers, ref_by_category = settle_groups_decimal(
+            matched, variants, bets, category_prizes, category_bets
+        )
+        self.assertEqual(wins.tolist(), ref_wins)
+        self.assertEqual(multipliers.tolist(), ref_multipliers)
+        self.assertEqual(by_category, ref_by_category)
+        return wins.tolist(), multipliers.tolist(), by_category
+
+    def test_bet_cents_rounds_half_to_even(self):
+        for amount in range(0, 1000):
+            for num_variants in (1, 2, 3, 4, 8, 16, 27, 59049):
+                expected = Decimal(amount) / 100 / num_variants
+                self.assertEqual(
+                    bet_cents(amount, num_variants),
+                    int(expected.quantize(Decimal("0.01")) * 100),
+                    (amount, num_variants),
+                )
+        self.assertEqual(bet_cents(5, 2), 2)
+        self.assertEqual(bet_cents(7, 2), 4)
+
+    def test_half_cent_payout_rounds_up(self):
+        # двое с одинаковой ставкой: призы категорий 6-8 по 1 копейке — каждому по полкопейки,
+        # округляется вверх; категории 9 и 10 (2 и 4 копейки) делятся ровно
+        wins, _, by_category = self.settle_both([10, 10], [1, 1], [100, 100], pool_cents=10)
+        self.assertEqual(wins, [6, 6])
+        self.assertEqual(by_category, {6: 2, 7: 2, 8: 2, 9: 2, 10: 4})
+
+    def test_half_multiplier_rounds_to_even(self):
+        # выигрыш 1 копейка на ставку 8 копеек: множитель 0.125 -> 0.12
+        wins, multipliers, _ = self.settle_both([6], [1], [8], pool_cents=10)
+        self.assertEqual(wins, [1])
+        self.assertEqual(multipliers, [12])
+
+    def test_single_variant_takes_all_categories(self):
+        wins, multipliers, by_category = self.settle_both([10], [1], [1000], pool_cents=1_000_000)
+        self.assertEqual(wins, [950_000])
+        self.assertEqual(multipliers, [95_000])
+        self.assertEqual(sum(by_category.values()), 950_000)
+
+    def test_system_coupon_with_all_variants(self):
+        # системный купон на все 3**10 исходов: группы по числу совпадений из гистограммы
+        choices = [[0, 1, 2]] * outcome_codes.MATCHES_PER_ROUND
+        results = [0] * outcome_codes.MATCHES_PER_ROUND
+        hist = outcome_codes.matched_histogram(choices, results)
+        self.assertEqual(sum(hist), 59049)
+
+        bet = bet_cents(59049 * 25 + 7, 59049)
+        matched = [k for k, n in enumerate(hist) if k >= 6 and n]
+        variants = [hist[k] for k in matched]
+        # и одиночная ставка, угадавшая все матчи
+        matched.append(10)
+        variants.append(1)
+        bets = [bet] * (len(matched) - 1) + [333]
+
+        self.settle_both(matched, variants, bets, pool_cents=1_476_225)
+
+    def test_random_groups_across_categories(self):
+        rnd = random.Random(1)
+        matched, variants, bets = [], [], []
+        for _ in range(5000):
+            num_variants = rnd.choice((1, 2, 3, 4, 6, 8, 9, 12, 16, 18, 24, 27, 59049))
+            matched.append(rnd.choice((6, 6, 6, 7, 7, 8, 9, 10)))
+            variants.append(rnd.randint(1, num_variants))
+            bets.append(bet_cents(rnd.randint(10, 100_000), num_variants))
+
+        for pool_cents in (1, 999, 10_000_000, 123_456_789):
+            self.settle_both(matched, variants, bets, pool_cents)
+
+
+class OutcomeCodesTests(SimpleTestCase):
+    """Упаковка выбора в коды и гистограмма совпадений против полного перебора вариантов."""
+
+    def brute_histogram(self, choices, results):
+        hist = [0] * (len(choices) + 1)
+        for code in outcome_codes.expand_codes(choices):
+            hist[outcome_codes.matched_count(code, results)] += 1
+        return hist
+
+    def random_case(self, rnd, size=outcome_codes.MATCHES_PER_ROUND, max_picks=3):
+        choices = [sorted(rnd.sample(range(3), rnd.randint(1, max_picks))) for _ in range(size)]
+        results = [rnd.choice((0, 1, 2, None)) for _ in range(size)]
+        return choices, results
+
+    def test_encode_decode_roundtrip(self):
+        rnd = random.Random(3)
+        for _ in range(500):
+            digits = [rnd.randrange(3) for _ in range(outcome_codes.MATCHES_PER_ROUND)]
+            code = outcome_codes.encode(digits)
+            self.assertTrue(0 <= code < outcome_codes.CODES_PER_ROUND)
+            self.assertEqual(outcome_codes.decode(code), digits)
+        self.assertEqual(outcome_codes.encode([2] * outcome_codes.MATCHES_PER_ROUND), 59048)
+
+    def test_mask_roundtrip(self):
+        rnd = random.Random(4)
+        for _ in range(500):
+            choices, _ = self.random_case(rnd)
+            self.assertEqual(outcome_codes.unpack_mask(outcome_codes.pack_mask(choices)), choices)
+
+    def test_code_orders_agree(self):
+        rnd = random.Random(5)
+        for _ in range(50):
+            choices, _ = self.random_case(rnd, max_picks=2)
+            codes = outcome_codes.expand_codes(choices)
+            self.assertEqual(list(outcome_codes.iter_codes(choices)), codes)
+            self.assertEqual([outcome_codes.nth_code(choices, i) for i in range(len(codes))], codes)
+            self.assertEqual(outcome_codes.count_variants(choices), len(codes))
+
+    def test_matched_count_matches_decoded_digits(self):
+        rnd = random.Random(6)
+        for _ in range(500):
+            digits = [rnd.randrange(3) for _ in range(outcome_codes.MATCHES_PER_ROUND)]
+            results = [rnd.choice((0, 1, 2, None)) for _ in range(outcome_codes.MATCHES_PER_ROUND)]
+            self.assertEqual(
+                outcome_codes.matched_count(outcome_codes.encode(digits), results),
+                sum(1 for d, r in zip(digits, results) if r is not None and d == r),
+            )
+
+    def test_histogram_matches_brute_force(self):
+        rnd = random.Random(7)
+        for _ in range(200):
+            choices, results = self.random_case(rnd, size=rnd.randint(1, 6))
+            self.assertEqual(outcome_codes.matched_histogram(choices, results), self.brute_histogram(choices, results))
+
+    def test_histogram_all_three_outcomes(self):
+        choices = [[0, 1, 2]] * 5
+        for results in ([0, 1, 2, 0, 1], [None] * 5, [2, None, 0, None, 1]):
+            self.assertEqual(outcome_codes.matched_histogram(choices, results), self.brute_histogram(choices, results))
+
+    def test_full_system_coupon_histogram(self):
+        choices = [[0, 1, 2]] * outcome_codes.MATCHES_PER_ROUND
+        results = [1] * outcome_codes.MATCHES_PER_ROUND
+        hist = outcome_codes.matched_histogram(choices, results)
+        self.assertEqual(sum(hist), outcome_codes.CODES_PER_ROUND)
+        self.assertEqual(hist, [math.comb(10, k) * 2 ** (10 - k) for k in range(11)])
+        self.assertEqual(hist, self.brute_histogram(choices, results))
+        # до результатов у всех вариантов 0 совпадений
+        self.assertEqual(outcome_codes.matched_histogram(choices, [None] * 10), [59049] + [0] * 10)
+
+    def test_iter_matched_codes_matches_brute_force(self):
+        rnd = random.Random(8)
+        for _ in range(100):
+            choices, results = self.random_case(rnd)
+            codes = outcome_codes.expand_codes(choices) if outcome_codes.count_variants(choices) <= 2000 else None
+            hist = outcome_codes.matched_histogram(choices, results)
+            for k in range(len(choices) + 1):
+                matched = list(outcome_codes.iter_matched_codes(choices, results, k))
+                self.assertEqual(len(matched), hist[k] if k < len(hist) else 0)
+                self.assertTrue(all(outcome_codes.matched_count(c, results) == k for c in matched))
+                if codes is not None:
+                    self.assertEqual(matched, [c for c in codes if outcome_codes.matched_count(c, results) == k])
+
+
+class FairnessChainTests(SimpleTestCase):
+    """Цепочка сидов и вывод исходов из сида (то, что проверяет verify_rounds)."""
+
+    SECRET = "a3" * 32
+    LENGTH = 50
+
+    def test_each_seed_hashes_to_previous(self):
+        seeds = fairness.chain_seeds(self.SECRET, self.LENGTH, 0, self.LENGTH)
+        self.assertEqual(len(set(seeds)), self.LENGTH)
+        for k in range(1, self.LENGTH):
+            self.assertEqual(fairness.sha256_hex(seeds[k]), seeds[k - 1])
+            # verify_rounds: сид, захэшированный на разницу номеров, даёт сид более раннего раунда
+            self.assertEqual(fairness.hash_times(seeds[k], k), seeds[0])
+
+    def test_first_round_commits_to_terminal_hash(self):
+        terminal = fairness.hash_times(self.SECRET, self.LENGTH)
+        seed = fairness.chain_seeds(self.SECRET, self.LENGTH, 0, 1)[0]
+        self.assertEqual(fairness.sha256_hex(seed), terminal)  # game_hash первого раунда цепочки
+
+    def test_chain_window_matches_full_chain(self):
+        seeds = fairness.chain_seeds(self.SECRET, self.LENGTH, 0, self.LENGTH)
+        for start, count in ((0, 1), (10, 5), (self.LENGTH - 3, 3)):
+            self.assertEqual(fairness.chain_seeds(self.SECRET, self.LENGTH, start, count), seeds[start:start + count])
+
+    def test_outcomes_are_stable_and_valid(self):
+        seeds = fairness.chain_seeds(self.SECRET, self.LENGTH, 0, self.LENGTH)
+        counts = [0, 0, 0]
+        for round_id, seed in enumerate(seeds, start=1):
+            outcomes = fairness.round_outcomes(seed, round_id, outcome_codes.MATCHES_PER_ROUND)
+            self.assertEqual(outcomes, fairness.round_outcomes(seed, round_id, outcome_codes.MATCHES_PER_ROUND))
+            digits = outcome_codes.result_digits(outcomes)
+            self.assertTrue(all(d in (0, 1, 2) for d in digits))
+            for d in digits:
+                counts[d] += 1
+        # 500 исходов: каждый из трёх встречается (грубая проверка, что mod 3 не вырожден)
+        self.assertTrue(all(c > 100 for c in counts), counts)
@@ -1,6 +1,7 @@
 from django.urls import path, include
 
-from games.views.bet import PlaceBetView
+from games.views.bet import PlaceBetView, PlaceBetBatchView
+from games.views.live import CurrentRoundStreamView, CurrentRoundWaitView
 from games.views.payout import PayoutCategoryListView
 from games.views.rounds import CurrentRoundView, CurrentRoundPoolView, RoundHistoryView, \
     LastBetVariantsView, RoundStatsView, MyVariantsInRoundView
@@ -13,6 +14,8 @@ urlpatterns = [
     path('current_round/', include([
         path('', CurrentRoundView.as_view()),
         path('pool/', CurrentRoundPoolView.as_view()),
+        path('stream/', CurrentRoundStreamView.as_view()),
+        path('wait/', CurrentRoundWaitView.as_view()),
     ])),
     path('variants/', LastBetVariantsView.as_view()),
     path('history/', RoundHistoryView.as_view()),
@@ -22,6 +25,7 @@ urlpatterns = [
     path("<int:pk>/my-variants/", MyVariantsInRoundView.as_view()),
 
     path('bet/', PlaceBetView.as_view()),
+    path('bet/batch/', PlaceBetBatchView.as_view()),
 
     path('my-win-coupon/', MyWinCouponView.as_view()),
 
@@ -0,0 +1,102 @@
+"""
+Лента последних ставок текущего раунда в памяти процесса (LastBetVariantsView).
+
+Хранятся последние RING_SIZE купонов раунда: ник, ставка одного варианта, число вариантов —
+этого хватает на MAX_LIMIT последних вариантов (все варианты купона одинаковы для ленты).
+Принятые процессом купоны добавляются сразу после коммита (append). Раз в SYNC_INTERVAL
+лента сверяется с БД: текущий раунд и купоны, принятые другими процессами; при смене
+раунда (и при старте процесса) собирается заново. Остальные запросы обслуживаются из памяти.
+"""
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from games.models.bets import BetCoupon
+from games.models.rounds import Round
+
+RING_SIZE = 100  # купонов (не меньше LastBetVariantsView.MAX_LIMIT вариантов)
+SYNC_INTERVAL = 1.0  # секунд между сверками с БД
+
+ACTIVE_STATUSES = [Round.Status.SELECTION, Round.Status.CALCULATION, Round.Status.PAYOUT]
+
+
+class BetFeed:
+    def __init__(self):
+        self.round_id: Optional[int] = None
+        self.status: Optional[str] = None
+        self._coupons: Dict[int, Tuple[str, Decimal, int]] = {}  # coupon_id -> (ник, ставка варианта, вариантов)
+        self._last_synced_id = 0
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def append(self, round_id, coupons: List[Tuple[int, str, Decimal, int]]):
+        """Купоны, принятые этим процессом: (coupon_id, ник, amount_total, num_variants)."""
+        with self._lock:
+            if round_id != self.round_id:
+                return
+            for coupon_id, username, amount_total, num_variants in coupons:
+                self._coupons[coupon_id] = (username, _variant_bet(amount_total, num_variants), num_variants)
+            self._trim()
+
+    def current(self) -> Tuple[Optional[int], Optional[str]]:
+        """Текущий раунд и его статус (сверка с БД не чаще раза в SYNC_INTERVAL)."""
+        if time.monotonic() - self._synced_at >= SYNC_INTERVAL:
+            self._sync()
+        return self.round_id, self.status
+
+    def latest(self, limit: int) -> List[Tuple[str, Decimal]]:
+        """Последние limit вариантов, от новых к старым: (ник, ставка варианта)."""
+        items = []
+        with self._lock:
+            for coupon_id in sorted(self._coupons, reverse=True):
+                username, bet, num_variants = self._coupons[coupon_id]
+                items.extend([(username, bet)] * min(num_variants, limit - len(items)))
+                if len(items) >= limit:
+                    break
+        return items
+
+    def _sync(self):
+        row = (
+            Round.objects
+            .filter(status__in=ACTIVE_STATUSES)
+            .order_by("-id")
+            .values_list("id", "status")
+            .first()
+        )
+        round_id, status = row if row else (None, None)
+
+        coupons = BetCoupon.objects.filter(round_id=round_id).order_by("-id")
+        if round_id != self.round_id:
+            # новый раунд (или первый запрос процесса) — лента собирается заново
+            fresh, rebuild = coupons, True
+        else:
+            fresh, rebuild = coupons.filter(id__gt=self._last_synced_id), False
+        rows = list(fresh.values_list("id", "user__username", "amount_total", "num_variants")[:RING_SIZE]) \
+            if round_id is not None else []
+
+        with self._lock:
+            if rebuild:
+                self._coupons = {}
+                self._last_synced_id = 0
+            self.round_id, self.status = round_id, status
+            for coupon_id, username, amount_total, num_variants in rows:
+                self._coupons[coupon_id] = (username, _variant_bet(amount_total, num_variants), num_variants)
+            if rows:
+                self._last_synced_id = max(self._last_synced_id, rows[0][0])
+            self._trim()
+            self._synced_at = time.monotonic()
+
+    def _trim(self):
+        if len(self._coupons) > RING_SIZE:
+            for coupon_id in sorted(self._coupons)[:len(self._coupons) - RING_SIZE]:
+                del self._coupons[coupon_id]
+
+
+def _variant_bet(amount_total, num_variants) -> Decimal:
+    # как BetVariantSerializer.get_bet_amount: сумма купона (до копейки) / число вариантов
+    amount = Decimal(amount_total).quantize(Decimal("0.01"))
+    return amount / num_variants if num_variants else 0
+
+
+feed = BetFeed()
@@ -0,0 +1,159 @@
+"""
+Очередь приёма ставок (write-behind).
+
+PlaceBetView проверяет ставку и резервирует баланс синхронно (запись журнала с is_pending=True),
+а купон кладёт в очередь процесса. Рабочий поток забирает купоны пачками и пишет пачку
+одной транзакцией: купоны, варианты (COPY), привязка резервов к купонам, пул раунда — один раз.
+
+Очередь дописывается уже после закрытия приёма: close_selection переводит раунд в CALCULATION
+(новых ставок нет — статус проверяет FOR SHARE в lock_round_for_bets), а finish_intake ждёт,
+пока у раунда не останется резервов (wait_drained). Так окно приёма закрывается точно по времени,
+а не ждёт очередь. Резервы, не записанные за DRAIN_TIMEOUT (например, процесс упал),
+возвращаются на баланс. Резервы, которые держит зависшая транзакция пачки, ждём не дольше
+LOCKED_TIMEOUT: вернуть их нельзя (пачка ещё может записать купоны), поэтому расчёт идёт дальше,
+а остаток пишется в лог для ручной проверки.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import List
+
+from django.db import close_old_connections, transaction
+
+from games.management.commands.services.bulk_write import bulk_update_from_copy
+from games.utils import bet_feed
+from games.utils.coupons import CouponDraft, insert_coupons
+from users import ledger
+from users.models import BalanceEntry
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500  # купонов в одной транзакции
+BATCH_WAIT = 0.05  # секунд, сколько добирать пачку после первого купона
+DRAIN_TIMEOUT = 10  # секунд ожидания очереди перед калькуляцией
+LOCKED_TIMEOUT = 10  # секунд ожидания резервов, которые прямо сейчас записывает пачка
+DRAIN_POLL_INTERVAL = 0.1  # секунд
+
+
+@dataclass
+class PendingBet:
+    entry_id: int  # резерв в журнале баланса
+    user_id: int
+    round_id: int
+    coupon: CouponDraft
+    username: str = ""  # для ленты последних ставок
+
+
+_queue = queue.Queue()
+_worker_lock = threading.Lock()
+_worker_pid = None
+
+
+def submit(bet: PendingBet):
+    """Кладёт купон в очередь процесса (рабочий поток запускается при первой ставке)."""
+    _ensure_worker()
+    _queue.put(bet)
+
+
+def _ensure_worker():
+    global _worker_pid
+    # после fork (gunicorn --preload) поток родителя в дочернем процессе не существует
+    if _worker_pid == os.getpid():
+        return
+    with _worker_lock:
+        if _worker_pid != os.getpid():
+            threading.Thread(target=_run, name="bet-queue", daemon=True).start()
+            _worker_pid = os.getpid()
+
+
+def _run():
+    while True:
+        batch = [_queue.get()]
+        deadline = time.monotonic() + BATCH_WAIT
+        while len(batch) < BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(_queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        try:
+            commit_batch(batch)
+        except Exception:
+            # резервы остаются is_pending и будут возвращены при калькуляции
+            logger.exception("Не удалось записать пачку из %s купонов", len(batch))
+        finally:
+            close_old_connections()
+
+
+def commit_batch(bets: List[PendingBet]) -> int:
+    """Записывает пачку купонов одной транзакцией. Возвращает число записанных купонов."""
+    with transaction.atomic():
+        # резервы, уже возвращённые при калькуляции, не записываем
+        reserved = set(
+            BalanceEntry.objects
+            .select_for_update()
+            .filter(id__in=[b.entry_id for b in bets], is_pending=True)
+            .values_list("id", flat=True)
+        )
+        bets = [b for b in bets if b.entry_id in reserved]
+        if not bets:
+            return 0
+
+        # купоны, варианты и пул раунда — одной пачкой
+        coupons = insert_coupons([(b.user_id, b.round_id, b.coupon) for b in bets])
+
+        bulk_update_from_copy(
+            BalanceEntry,
+            ["id"],
+            ["coupon_id", "is_pending"],
+            ((b.entry_id, coupon.id, False) for b, coupon in zip(bets, coupons)),
+        )
+
+        # лента последних ставок процесса пополняется после коммита
+        accepted = defaultdict(list)
+        for b, coupon in zip(bets, coupons):
+            accepted[b.round_id].append((coupon.id, b.username, b.coupon.amount_total, b.coupon.num_variants))
+        transaction.on_commit(lambda: _append_to_feed(accepted))
+
+    return len(bets)
+
+
+def _append_to_feed(accepted):
+    for round_id, rows in accepted.items():
+        bet_feed.feed.append(round_id, rows)
+
+
+def wait_drained(round_id, timeout: float = DRAIN_TIMEOUT) -> int:
+    """
+    Ждёт, пока очереди всех процессов запишут купоны раунда.
+    По истечении timeout возвращает деньги по оставшимся резервам. Возвращает число возвратов.
+    """
+    deadline = time.monotonic() + timeout
+    while ledger.has_pending(round_id) and time.monotonic() < deadline:
+        time.sleep(DRAIN_POLL_INTERVAL)
+
+    refunded = 0
+    deadline = time.monotonic() + LOCKED_TIMEOUT
+    while ledger.has_pending(round_id):
+        # заблокированные резервы сейчас записываются очередью — дожидаемся их
+        refunded += ledger.refund_pending(round_id)
+        if not ledger.has_pending(round_id):
+            break
+        if time.monotonic() >= deadline:
+            stuck = BalanceEntry.objects.filter(round_id=round_id, is_pending=True).count()
+            logger.error(
+                "Раунд %s: %s резервов не записаны и не возвращены за %s с, расчёт идёт без них",
+                round_id, stuck, timeout + LOCKED_TIMEOUT,
+            )
+            break
+        time.sleep(DRAIN_POLL_INTERVAL)
+    if refunded:
+        logger.warning("Раунд %s: возвращено %s незаписанных ставок", round_id, refunded)
+    return refunded
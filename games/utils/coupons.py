@@ -0,0 +1,52 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import List, Optional, Sequence, Tuple
+
+from games.management.commands.services.bulk_write import copy_insert
+from games.models.bets import BetCoupon, BetVariant
+from games.utils import live_pool
+
+
+@dataclass
+class CouponDraft:
+    """Проверенный купон, готовый к записи."""
+    amount_total: Decimal
+    num_variants: int
+    selection_mask: Optional[int] = None  # системный купон: только маска выбора
+    codes: Optional[List[int]] = None  # обычный купон: коды вариантов
+
+
+def insert_coupons(rows: Sequence[Tuple[int, int, CouponDraft]]) -> List[BetCoupon]:
+    """
+    Пакетная запись купонов: rows — (user_id, round_id, CouponDraft).
+    Купоны — один INSERT ... RETURNING id, варианты всех купонов — один COPY,
+    пул каждого раунда увеличивается один раз — это единственное место, где купоны попадают в пул.
+    Вызывать внутри transaction.atomic().
+    """
+    coupons = BetCoupon.objects.bulk_create([
+        BetCoupon(
+            user_id=user_id,
+            round_id=round_id,
+            amount_total=draft.amount_total,
+            num_variants=draft.num_variants,
+            selection_mask=draft.selection_mask,
+        )
+        for user_id, round_id, draft in rows
+    ])
+
+    copy_insert(
+        BetVariant,
+        ["coupon", "outcome_code"],
+        ((coupon.id, code) for (_, _, draft), coupon in zip(rows, coupons) for code in (draft.codes or ())),
+    )
+
+    pools = defaultdict(Decimal)
+    variants = defaultdict(int)
+    for _, round_id, draft in rows:
+        pools[round_id] += Decimal(draft.amount_total).quantize(Decimal("0.01"))
+        variants[round_id] += draft.num_variants
+    for round_id, amount in pools.items():
+        live_pool.add_to_pool(round_id, amount, variants=variants[round_id])
+
+    return coupons
@@ -0,0 +1,220 @@
+"""
+Источник случайности для результатов матчей.
+
+Исходы матчей (целые 1..3) берутся из буфера процесса, который пополняется в фоне
+пачками — один запрос покрывает все заранее созданные раунды, поэтому расчёт раунда
+не ждёт сети. Цепочка источников задаётся settings.ENTROPY_BACKENDS:
+  random_org — RANDOM.ORG JSON-RPC (без settings.RANDOM_ORG_API_KEY пропускается);
+  system     — ОС (secrets.SystemRandom);
+  local      — детерминированный генератор с settings.ENTROPY_SEED (офлайн-тесты).
+Источники пробуются по порядку. Если буфер пуст, недостающие числа сразу берутся
+у последнего источника цепочки (он должен работать без сети).
+"""
+import logging
+import os
+import random
+import secrets
+import threading
+import time
+from collections import deque
+from typing import List
+
+import httpx
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+OUTCOME_MIN = 1
+OUTCOME_MAX = 3
+
+RND_ENDPOINT = "https://api.random.org/json-rpc/4/invoke"
+RND_TIMEOUT = 10  # секунд
+RND_MAX_N = 10_000  # лимит generateIntegers за один вызов
+
+REFILL_BATCH = 240  # чисел за один запрос (3 полных запаса по 8 раундов x 10 матчей)
+LOW_WATER = 80  # при меньшем остатке буфер пополняется в фоне
+
+
+class EntropyError(RuntimeError):
+    pass
+
+
+class RandomOrgBackend:
+    name = "random_org"
+
+    def __init__(self, api_key: str, timeout: float = RND_TIMEOUT):
+        self.api_key = api_key
+        self.timeout = timeout
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def fetch(self, n: int) -> List[int]:
+        if not self.api_key:
+            raise EntropyError("RANDOM_ORG_API_KEY не задан в settings")
+        payload = {
+            "jsonrpc": "2.0",
+            "method": "generateIntegers",
+            "params": {
+                "apiKey": self.api_key,
+                "n": min(n, RND_MAX_N),
+                "min": OUTCOME_MIN,
+                "max": OUTCOME_MAX,
+                "replacement": True,
+            },
+            "id": int(time.time() * 1000),
+        }
+        with httpx.Client(timeout=self.timeout) as client:
+            resp = client.post(RND_ENDPOINT, json=payload)
+            resp.raise_for_status()
+            data = resp.json()
+
+        if "error" in data:
+            raise EntropyError(f"RANDOM.ORG error: {data['error']}")
+        return data["result"]["random"]["data"]
+
+
+class SystemBackend:
+    name = "system"
+
+    def __init__(self):
+        self._rnd = secrets.SystemRandom()
+
+    def fetch(self, n: int) -> List[int]:
+        return [self._rnd.randint(OUTCOME_MIN, OUTCOME_MAX) for _ in range(n)]
+
+
+class LocalBackend:
+    """Детерминированный источник: одна и та же последовательность при одном seed."""
+    name = "local"
+
+    def __init__(self, seed: int = 0):
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def fetch(self, n: int) -> List[int]:
+        with self._lock:
+            return [self._rnd.randint(OUTCOME_MIN, OUTCOME_MAX) for _ in range(n)]
+
+
+class FallbackChain:
+    """Пробует источники по порядку, первый успешный отдаёт числа."""
+
+    def __init__(self, backends: list):
+        if not backends:
+            raise EntropyError("Пустая цепочка источников случайности")
+        self.backends = backends
+
+    @property
+    def name(self) -> str:
+        return ",".join(b.name for b in self.backends)
+
+    @property
+    def last(self):
+        return self.backends[-1]
+
+    def fetch(self, n: int) -> List[int]:
+        for backend in self.backends:
+            try:
+                return backend.fetch(n)
+            except Exception as e:
+                logger.warning("Источник случайности %s недоступен: %s", backend.name, e)
+        raise EntropyError(f"Все источники случайности недоступны: {self.name}")
+
+
+class EntropyPool:
+    """Буфер исходов с фоновым пополнением."""
+
+    def __init__(self, chain: FallbackChain, batch: int = REFILL_BATCH, low_water: int = LOW_WATER):
+        self.chain = chain
+        self.batch = batch
+        self.low_water = low_water
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._refilling = False
+        self._wanted = 0  # сколько чисел запрошено заранее (prefetch)
+
+    def take(self, n: int) -> List[int]:
+        """n исходов из буфера; без ожидания сети — недостающие даёт последний источник цепочки."""
+        with self._lock:
+            values = [self._buffer.popleft() for _ in range(min(n, len(self._buffer)))]
+        if len(values) < n:
+            missing = n - len(values)
+            logger.warning("Буфер случайности пуст, %s чисел взято у %s", missing, self.chain.last.name)
+            values += self.chain.last.fetch(missing)
+        self._maybe_refill()
+        return values
+
+    def prefetch(self, n: int, wait: bool = False):
+        """
+        Заранее запросить n чисел одним запросом к цепочке (например, под все раунды без сида).
+        wait=True — синхронно (EntropyError, если все источники недоступны), иначе в фоне.
+        """
+        with self._lock:
+            self._wanted = max(self._wanted, n)
+        if wait:
+            self.refill()
+        else:
+            self._maybe_refill()
+
+    def refill(self):
+        """Пополняет буфер одним запросом к цепочке (синхронно)."""
+        with self._lock:
+            need = max(self.batch, self._wanted + self.low_water - len(self._buffer))
+        values = self.chain.fetch(need)
+        with self._lock:
+            self._buffer.extend(values)
+            self._wanted = 0
+
+    def size(self) -> int:
+        return len(self._buffer)
+
+    def _maybe_refill(self):
+        with self._lock:
+            if self._refilling or len(self._buffer) >= max(self.low_water, self._wanted):
+                return
+            self._refilling = True
+        threading.Thread(target=self._refill_in_background, name="entropy-refill", daemon=True).start()
+
+    def _refill_in_background(self):
+        try:
+            self.refill()
+        except Exception:
+            logger.exception("Не удалось пополнить буфер случайности")
+        finally:
+            with self._lock:
+                self._refilling = False
+
+
+BACKENDS = {
+    RandomOrgBackend.name: lambda: RandomOrgBackend(settings.RANDOM_ORG_API_KEY),
+    SystemBackend.name: SystemBackend,
+    LocalBackend.name: lambda: LocalBackend(settings.ENTROPY_SEED),
+}
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def build_chain(names) -> FallbackChain:
+    unknown = [name for name in names if name not in BACKENDS]
+    if unknown:
+        raise EntropyError(f"Неизвестные источники случайности: {', '.join(unknown)}")
+    backends = [BACKENDS[name]() for name in names]
+    for backend in backends:
+        if not getattr(backend, "configured", True):
+            logger.info("Источник случайности %s не настроен, пропускаем", backend.name)
+    return FallbackChain([b for b in backends if getattr(b, "configured", True)])
+
+
+def get_pool() -> EntropyPool:
+    """Буфер процесса (после fork создаётся заново: поток пополнения родителя не наследуется)."""
+    global _pool, _pool_pid
+    if _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool_pid != os.getpid():
+                _pool = EntropyPool(build_chain(settings.ENTROPY_BACKENDS))
+                _pool_pid = os.getpid()
+    return _pool
@@ -0,0 +1,96 @@
+"""
+Доказуемо честные результаты (provably fair).
+
+Каждый раунд при создании получает server_seed из цепочки хэшей (SeedChain), а в game_hash
+публикуется sha256(server_seed). Исход i-го матча раунда (матчи по id) однозначно выводится
+из сида: HMAC-SHA256(server_seed, "<round_id>:<i>") mod 3. При калькуляции результаты
+только раскрываются — ни сети, ни случайности в этот момент нет.
+
+Проверка (verify_rounds): sha256(server_seed) == game_hash, сид раунда, захэшированный
+столько раз, на сколько он дальше в цепочке, даёт сид предыдущего проверенного раунда цепочки,
+результаты матчей совпадают с выведенными из сида.
+Все хэши считаются от hex-строк, поэтому проверяются любым sha256 без преобразований.
+"""
+import hashlib
+import hmac
+import secrets
+from typing import List
+
+from django.db import transaction
+from django.db.models import F
+
+from games.models.matchs import Match
+from games.models.rounds import Round, SeedChain
+
+CHAIN_LENGTH = 10_000  # сидов в одной цепочке (раундов до выпуска новой цепочки)
+
+# исход по остатку HMAC mod 3
+OUTCOMES = (Match.Outcome.WIN_1, Match.Outcome.DRAW, Match.Outcome.WIN_2)
+
+
+def sha256_hex(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def chain_seeds(secret: str, length: int, start: int, count: int) -> List[str]:
+    """Сиды раундов start..start+count-1 цепочки: сид k = h[length-1-k]."""
+    last = length - 1 - start  # самый «глубокий» нужный хэш
+    first = last - count + 1
+    seeds = []
+    value = secret
+    for j in range(last + 1):
+        if j >= first:
+            seeds.append(value)
+        value = sha256_hex(value)
+    return seeds[::-1]
+
+
+def hash_times(value: str, times: int) -> str:
+    for _ in range(times):
+        value = sha256_hex(value)
+    return value
+
+
+def new_chain(length: int = CHAIN_LENGTH) -> SeedChain:
+    secret = secrets.token_hex(32)
+    return SeedChain.objects.create(secret=secret, length=length, terminal_hash=hash_times(secret, length))
+
+
+def assign_seeds(rounds: List[Round]):
+    """Выдаёт раундам (по порядку id) следующие сиды цепочки и публикует game_hash."""
+    if not rounds:
+        return
+    with transaction.atomic():
+        chain = (
+            SeedChain.objects.select_for_update()
+            .filter(next_index__lt=F("length"))
+            .order_by("id")
+            .first()
+        )
+        pos = 0
+        while pos < len(rounds):
+            if chain is None:
+                chain = new_chain()
+            take = min(len(rounds) - pos, chain.length - chain.next_index)
+            seeds = chain_seeds(chain.secret, chain.length, chain.next_index, take)
+            for index, (round_obj, seed) in enumerate(zip(rounds[pos:pos + take], seeds), chain.next_index):
+                round_obj.server_seed = seed
+                round_obj.seed_index = index
+                round_obj.game_hash = sha256_hex(seed)
+                round_obj.seed_chain = chain
+            chain.next_index += take
+            chain.save(update_fields=["next_index"])
+            pos += take
+            if chain.next_index >= chain.length:
+                chain = None
+
+        Round.objects.bulk_update(rounds, ["server_seed", "game_hash", "seed_chain", "seed_index"])
+
+
+def round_outcomes(server_seed: str, round_id: int, n: int) -> List[str]:
+    """Исходы n матчей раунда (в порядке id матчей)."""
+    key = server_seed.encode()
+    return [
+        OUTCOMES[int.from_bytes(hmac.new(key, f"{round_id}:{i}".encode(), hashlib.sha256).digest(), "big") % 3]
+        for i in range(n)
+    ]
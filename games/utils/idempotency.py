@@ -0,0 +1,104 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from games.models.idempotency import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 128
+IN_FLIGHT_TIMEOUT = 60  # секунд, сколько держится метка «запрос выполняется»
+KEY_TTL = 24 * 60 * 60  # секунд хранения ответа
+
+
+class RequestInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Запрос с этим Idempotency-Key ещё выполняется."
+    default_code = "request_in_progress"
+
+
+def idempotent_response(request, scope: str, handler) -> Response:
+    """
+    Выполняет handler() (возвращает данные ответа) не больше одного раза на Idempotency-Key.
+    Ключ хранится per-user в таблице IdempotencyKey (общая для всех воркеров, уникальна по
+    (user, scope, key), TTL): повтор запроса с тем же ключом получает сохранённый ответ,
+    параллельный повтор — 409. Без заголовка handler выполняется как обычно.
+    Сохраняются только успешные ответы.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        return Response(handler())
+    if len(key) > MAX_KEY_LENGTH:
+        raise ValidationError(f"{IDEMPOTENCY_HEADER} длиннее {MAX_KEY_LENGTH} символов.")
+
+    key_hash = hashlib.sha256(key.encode()).hexdigest()
+    fingerprint = hashlib.sha256(
+        json.dumps(request.data, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+    # INSERT ... ON CONFLICT — атомарная метка «выполняется»: второй такой же запрос её не получит
+    key_id = _claim(request.user.id, scope, key_hash, fingerprint)
+    if key_id is None:
+        return _replay(
+            IdempotencyKey.objects
+            .filter(user_id=request.user.id, scope=scope, key=key_hash)
+            .values("fingerprint", "response")
+            .first(),
+            fingerprint,
+        )
+
+    try:
+        data = handler()
+    except Exception:
+        IdempotencyKey.objects.filter(id=key_id).delete()
+        raise
+
+    # ответ хранится в том виде, в каком его отдаёт DRF (Decimal, даты — как в JSON ответа)
+    IdempotencyKey.objects.filter(id=key_id).update(
+        response=json.loads(JSONRenderer().render(data)),
+        expires_at=timezone.now() + timedelta(seconds=KEY_TTL),
+    )
+    return Response(data)
+
+
+def purge_expired() -> int:
+    """Удаляет просроченные ключи (вызывается движком, см. MaintenanceWorker)."""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lt=timezone.now()).delete()
+    return deleted
+
+
+def _claim(user_id, scope, key_hash, fingerprint):
+    """id новой метки или None, если живой ключ уже есть (просроченный занимается заново)."""
+    now = timezone.now()
+    table = connection.ops.quote_name(IdempotencyKey._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (user_id, scope, key, fingerprint, response, expires_at)
+            VALUES (%s, %s, %s, %s, NULL, %s)
+            ON CONFLICT (user_id, scope, key) DO UPDATE
+            SET fingerprint = EXCLUDED.fingerprint, response = NULL, expires_at = EXCLUDED.expires_at
+            WHERE {table}.expires_at < %s
+            RETURNING id
+            """,
+            [user_id, scope, key_hash, fingerprint, now + timedelta(seconds=IN_FLIGHT_TIMEOUT), now],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _replay(stored, fingerprint) -> Response:
+    if stored is None:
+        # ключ удалили между INSERT и SELECT (ошибка handler) — клиенту стоит повторить запрос
+        raise RequestInProgress()
+    if stored["fingerprint"] != fingerprint:
+        raise ValidationError(f"{IDEMPOTENCY_HEADER} уже использован с другим запросом.")
+    if stored["response"] is None:
+        raise RequestInProgress()
+    return Response(stored["response"], headers={"Idempotent-Replayed": "true"})
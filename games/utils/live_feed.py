@@ -0,0 +1,182 @@
+"""
+Живая лента текущего раунда для push-подписчиков (SSE, см. games/views/live.py).
+
+Один производитель на процесс: раз в TICK секунд одним запросом читает состояние текущего
+раунда (статус, живой пул, джекпот) и новые купоны, и раздаёт изменения всем подписчикам.
+Нагрузка на БД не зависит от числа клиентов. Обновления схлопываются: у подписчика хранится
+только последнее значение каждого события (round, pool, jackpot), новые ставки копятся
+до MAX_PENDING_BETS — медленный клиент получает свежее состояние, а не хвост очереди.
+Производитель запускается с первым подписчиком и останавливается, когда их не остаётся.
+Переходы раунда приходят от движка через pg_notify (games/utils/round_events.py) и будят
+производителя вне очереди — смена статуса видна сразу, а не через тик.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.db import close_old_connections
+from django.db.models import Subquery
+
+from games.models.bets import BetCoupon
+from games.models.jackpot import Jackpot
+from games.models.rounds import Round
+from games.management.commands.services.settlement import to_cents
+from games.utils import live_pool, round_events
+
+logger = logging.getLogger(__name__)
+
+TICK = 1.0  # секунд между опросами БД
+BETS_PER_TICK = 20  # сколько новых купонов читать за тик
+MAX_PENDING_BETS = 50  # сколько новых ставок держать для медленного подписчика
+
+ACTIVE_STATUSES = [Round.Status.SELECTION, Round.Status.CALCULATION, Round.Status.PAYOUT]
+
+# одно соединение с БД на процесс: все опросы идут в одном потоке
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="live-feed")
+
+
+class Subscriber:
+    def __init__(self):
+        self.pending: Dict[str, object] = {}
+        self.bets: List[dict] = []
+        self.ready = asyncio.Event()
+
+    def push(self, events: Dict[str, object], bets: List[dict]):
+        self.pending.update(events)
+        if bets:
+            self.bets = (self.bets + bets)[-MAX_PENDING_BETS:]
+        self.ready.set()
+
+    async def next_events(self, timeout: float) -> Optional[Dict[str, object]]:
+        """Накопленные события (None — за timeout ничего не пришло)."""
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self.ready.clear()
+        events, self.pending = self.pending, {}
+        if self.bets:
+            events["bets"], self.bets = self.bets, []
+        return events
+
+
+class LiveFeed:
+    def __init__(self):
+        self.state: Dict[str, object] = {}  # последние round / pool / jackpot
+        self._subscribers = set()
+        self._task: Optional[asyncio.Task] = None
+        self._last_coupon_id = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber()
+        self._subscribers.add(subscriber)
+        if self.state:
+            # новый подписчик сразу получает текущее состояние
+            subscriber.push(dict(self.state), [])
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+            self._task = self._loop.create_task(self._run())
+            round_events.start_listener(self.wake)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    def wake(self):
+        """Перечитать состояние вне очереди (можно вызывать из любого потока)."""
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wake.set)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._subscribers:
+            try:
+                events, bets = await loop.run_in_executor(_executor, self._poll)
+            except Exception:
+                logger.exception("Ошибка опроса живой ленты")
+                events, bets = {}, []
+            if events or bets:
+                for subscriber in list(self._subscribers):
+                    subscriber.push(events, bets)
+            try:
+                await asyncio.wait_for(self._wake.wait(), TICK)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+        # подписчиков нет — при следующем запуске состояние читается заново
+        self.state = {}
+        self._last_coupon_id = None
+
+    def _poll(self):
+        # выполняется в потоке _executor
+        close_old_connections()
+        row = (
+            Round.objects
+            .filter(status__in=ACTIVE_STATUSES)
+            .order_by("-id")
+            .annotate(
+                pool=live_pool.pool_subquery(),
+                jackpot=Subquery(Jackpot.objects.order_by("id").values("amount")[:1]),
+            )
+            .values("id", "status", "start_time", "selection_end_time", "pool", "jackpot")
+            .first()
+        )
+        if row is None:
+            return self._diff({"round": None}), []
+
+        current = {
+            "round": {
+                "id": row["id"],
+                "status": row["status"],
+                "start_time": row["start_time"],
+                "selection_end_time": row["selection_end_time"],
+            },
+            # pool_version — пул в копейках: одинаков во всех процессах, растёт со ставками
+            "pool": {"id": row["id"], "live_pool": row["pool"], "pool_version": to_cents(row["pool"] or Decimal("0"))},
+            # jackpot_version — джекпот в копейках: меняется и при расчёте предыдущего раунда
+            "jackpot": {
+                "amount": row["jackpot"],
+                "jackpot_version": to_cents(row["jackpot"]) if row["jackpot"] is not None else None,
+            },
+        }
+        return self._diff(current), self._new_bets(row["id"])
+
+    def _diff(self, current: Dict[str, object]) -> Dict[str, object]:
+        events = {key: value for key, value in current.items() if self.state.get(key) != value}
+        self.state.update(events)
+        return events
+
+    def _new_bets(self, round_id) -> List[dict]:
+        coupons = BetCoupon.objects.filter(round_id=round_id)
+        if self._last_coupon_id is None:
+            # после запуска ленты старые ставки не рассылаются
+            self._last_coupon_id = coupons.order_by("-id").values_list("id", flat=True).first() or 0
+            return []
+
+        rows = list(
+            coupons
+            .filter(id__gt=self._last_coupon_id)
+            .order_by("-id")
+            .values("id", "user__username", "amount_total", "num_variants")[:BETS_PER_TICK]
+        )
+        if rows:
+            self._last_coupon_id = rows[0]["id"]
+        return [
+            {
+                "coupon_id": r["id"],
+                "username": r["user__username"],
+                "amount_total": r["amount_total"],
+                "num_variants": r["num_variants"],
+            }
+            for r in reversed(rows)
+        ]
+
+
+feed = LiveFeed()
@@ -0,0 +1,75 @@
+import random
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from games.models.rounds import Round, RoundPoolShard
+
+POOL_SHARDS = 16
+VARIANTS_CACHE_TIMEOUT = 1  # секунд: счётчик вариантов для ленты ставок
+
+
+def add_to_pool(round_id, amount: Decimal, variants: int = 0):
+    """Атомарно прибавляет ставку и число вариантов к случайному шарду пула раунда."""
+    shard = random.randrange(POOL_SHARDS)
+    changes = {"amount": F("amount") + amount, "variants": F("variants") + variants}
+    updated = RoundPoolShard.objects.filter(round_id=round_id, shard=shard).update(**changes)
+    if not updated:
+        create_shards(round_id)
+        RoundPoolShard.objects.filter(round_id=round_id, shard=shard).update(**changes)
+    if variants:
+        # ставка этого процесса видна в счётчике сразу после коммита, а не через кэш
+        transaction.on_commit(lambda: cache.delete(_variants_key(round_id)))
+
+
+def create_shards(round_id):
+    RoundPoolShard.objects.bulk_create(
+        [RoundPoolShard(round_id=round_id, shard=shard) for shard in range(POOL_SHARDS)],
+        ignore_conflicts=True,
+    )
+
+
+def pool_subquery():
+    """Сумма шардов пула для Round (OuterRef("pk")) — для annotate / update."""
+    total = (
+        RoundPoolShard.objects
+        .filter(round=OuterRef("pk"))
+        .values("round")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    return Coalesce(
+        Subquery(total, output_field=DecimalField(max_digits=12, decimal_places=2)),
+        Value(Decimal("0.00")),
+    )
+
+
+def get_pool(round_id) -> Decimal:
+    return RoundPoolShard.objects.filter(round_id=round_id).aggregate(
+        total=Coalesce(Sum("amount"), Value(Decimal("0.00")))
+    )["total"]
+
+
+def flush_pool(round_id):
+    """Переписывает Round.live_pool суммой шардов (идемпотентно, без чтения в Python)."""
+    Round.objects.filter(id=round_id).update(live_pool=pool_subquery())
+
+
+def get_variants(round_id) -> int:
+    """
+    Число вариантов раунда: сумма счётчиков шардов (16 строк, не зависит от объёма ставок),
+    кэшируется на VARIANTS_CACHE_TIMEOUT.
+    """
+    key = _variants_key(round_id)
+    total = cache.get(key)
+    if total is None:
+        total = RoundPoolShard.objects.filter(round_id=round_id).aggregate(total=Sum("variants"))["total"] or 0
+        cache.set(key, total, VARIANTS_CACHE_TIMEOUT)
+    return total
+
+
+def _variants_key(round_id) -> str:
+    return f"round_variants:{round_id}"
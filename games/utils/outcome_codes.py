@@ -0,0 +1,159 @@
+"""
+Упаковка выбора по матчам раунда в одно целое число.
+
+Матчи раунда нумеруются по возрастанию id (0..9), исход каждого матча —
+троичная цифра: 0 — победа 1, 1 — ничья, 2 — победа 2.
+Код варианта = sum(digit_i * 3**i), т.е. от 0 до 3**10 - 1 = 59048.
+
+Маска системного купона — по 3 бита на матч (бит d = выбрана цифра d),
+матч i занимает биты 3*i..3*i+2.
+"""
+from itertools import product
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from games.models.matchs import Match
+
+MATCHES_PER_ROUND = 10
+CODES_PER_ROUND = 3 ** MATCHES_PER_ROUND
+
+RESULT_BY_DIGIT = (Match.Outcome.WIN_1, Match.Outcome.DRAW, Match.Outcome.WIN_2)
+DIGIT_BY_RESULT = {result.value: digit for digit, result in enumerate(RESULT_BY_DIGIT)}
+
+
+def encode(digits: Sequence[int]) -> int:
+    """Цифры исходов по матчам (в порядке матчей) -> код варианта."""
+    code = 0
+    for digit in reversed(digits):
+        code = code * 3 + digit
+    return code
+
+
+def decode(code: int, size: int = MATCHES_PER_ROUND) -> List[int]:
+    """Код варианта -> цифры исходов по матчам."""
+    digits = []
+    for _ in range(size):
+        code, digit = divmod(code, 3)
+        digits.append(digit)
+    return digits
+
+
+def expand_codes(choices: Sequence[Iterable[int]]) -> List[int]:
+    """
+    Все коды декартова произведения выборов по матчам.
+    choices[i] — допустимые цифры для i-го матча.
+    """
+    codes = [0]
+    weight = 1
+    for digits in choices:
+        codes = [code + digit * weight for digit in digits for code in codes]
+        weight *= 3
+    return codes
+
+
+def pack_mask(choices: Sequence[Iterable[int]]) -> int:
+    """Выборы по матчам -> маска системного купона."""
+    mask = 0
+    for idx, digits in enumerate(choices):
+        for digit in digits:
+            mask |= 1 << (3 * idx + digit)
+    return mask
+
+
+def unpack_mask(mask: int, size: int = MATCHES_PER_ROUND) -> List[List[int]]:
+    """Маска системного купона -> выборы по матчам (цифры по возрастанию)."""
+    return [[digit for digit in range(3) if mask >> (3 * idx + digit) & 1] for idx in range(size)]
+
+
+def count_variants(choices: Sequence[Sequence[int]]) -> int:
+    total = 1
+    for digits in choices:
+        total *= len(digits)
+    return total
+
+
+def iter_codes(choices: Sequence[Sequence[int]]) -> Iterator[int]:
+    """
+    Ленивый перебор кодов декартова произведения выборов.
+    Порядок совпадает с nth_code: первый матч меняется быстрее всех.
+    """
+    weights = [3 ** idx for idx in range(len(choices))]
+    for digits in product(*reversed(choices)):
+        yield sum(d * w for d, w in zip(digits, reversed(weights)))
+
+
+def nth_code(choices: Sequence[Sequence[int]], index: int) -> int:
+    """Код index-го варианта произведения без перебора предыдущих."""
+    code = 0
+    weight = 1
+    for digits in choices:
+        index, pos = divmod(index, len(digits))
+        code += digits[pos] * weight
+        weight *= 3
+    return code
+
+
+def result_digits(results: Sequence[Optional[str]]) -> List[Optional[int]]:
+    """Результаты матчей ('1' / 'X' / '2' / None) -> цифры (None, если результата нет)."""
+    return [DIGIT_BY_RESULT.get(r) for r in results]
+
+
+def matched_count(code: int, results: Sequence[Optional[int]]) -> int:
+    """Сколько исходов варианта совпало с результатами (results — из result_digits)."""
+    matched = 0
+    for expected in results:
+        code, digit = divmod(code, 3)
+        if expected is not None and digit == expected:
+            matched += 1
+    return matched
+
+
+def matched_histogram(choices: Sequence[Sequence[int]], results: Sequence[Optional[int]]) -> List[int]:
+    """
+    Сколько вариантов произведения выборов угадали ровно k исходов (индекс списка — k).
+    Без перебора вариантов: перемножаем многочлены (промахи + попадания * x) по матчам,
+    коэффициент при x**k — число вариантов с k совпадениями.
+    """
+    hist = [1]
+    for digits, expected in zip(choices, results):
+        hit = 1 if expected is not None and expected in digits else 0
+        miss = len(digits) - hit
+        nxt = [0] * (len(hist) + 1)
+        for k, n in enumerate(hist):
+            nxt[k] += n * miss
+            nxt[k + 1] += n * hit
+        hist = nxt
+    return hist
+
+
+def iter_matched_codes(choices: Sequence[Sequence[int]], results: Sequence[Optional[int]], k: int) -> Iterator[int]:
+    """
+    Ленивый перебор кодов произведения выборов, угадавших ровно k исходов (порядок как у iter_codes).
+    Остальные варианты не перебираются: ветка отсекается, как только k в ней уже не набрать.
+    """
+    size = len(choices)
+    expected = list(results[:size]) + [None] * (size - len(results))
+    # lo[i] / hi[i] — сколько совпадений обязательно / максимально возможно в матчах 0..i-1
+    lo, hi = [0], [0]
+    for digits, result in zip(choices, expected):
+        can_hit = result is not None and result in digits
+        lo.append(lo[-1] + (can_hit and len(digits) == 1))
+        hi.append(hi[-1] + can_hit)
+
+    def walk(i, code, need):
+        # матчи i-1..0 ещё не выбраны; последний матч меняется медленнее всех, как в iter_codes
+        if i == 0:
+            yield code
+            return
+        weight = 3 ** (i - 1)
+        for digit in choices[i - 1]:
+            rest = need - (digit == expected[i - 1])
+            if lo[i - 1] <= rest <= hi[i - 1]:
+                yield from walk(i - 1, code + digit * weight, rest)
+
+    if lo[size] <= k <= hi[size]:
+        yield from walk(size, 0, k)
+
+
+def round_matches(round_id):
+    """Матчи раунда в порядке кодирования (по возрастанию id)."""
+    return Match.objects.filter(round_id=round_id).order_by("id")
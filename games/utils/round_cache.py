@@ -0,0 +1,74 @@
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from django.utils import timezone
+
+from games.models.rounds import Round
+from games.utils import outcome_codes
+
+
+@dataclass(frozen=True)
+class RoundInfo:
+    """Что нужно для проверки ставки: статус, конец приёма ставок и матчи раунда."""
+    id: int
+    status: str
+    selection_end_time: Optional[datetime]
+    match_ids: Tuple[int, ...]  # в порядке разрядов кода варианта
+    match_index: Dict[int, int] = field(compare=False)  # match_id -> разряд
+
+
+# round_id -> RoundInfo; только раунды в приёме ставок, до selection_end_time
+_rounds: Dict[int, RoundInfo] = {}
+_lock = threading.Lock()
+
+
+def get_open_round(round_id) -> Optional[RoundInfo]:
+    """
+    Раунд, принимающий ставки, или None. Повторные обращения обслуживаются из памяти процесса
+    без запросов к БД; запись живёт до selection_end_time.
+    Сброса извне нет: статус меняет движок (отдельный процесс), до кэша веб-процессов он
+    не дотягивается. Поэтому кэш только отсекает заведомо закрытые раунды, а окончательную
+    проверку статуса делает транзакция ставки (FOR SHARE в lock_round_for_bets) — ставка
+    в раунд, уже закрытый движком, отклоняется там.
+    """
+    now = timezone.now()
+    info = _rounds.get(round_id)
+    if info is not None and now < info.selection_end_time:
+        return info
+
+    row = (
+        Round.objects
+        .filter(id=round_id, status=Round.Status.SELECTION)
+        .values_list("status", "selection_end_time")
+        .first()
+    )
+    if row is None:
+        invalidate(round_id)
+        return None
+
+    match_ids = tuple(outcome_codes.round_matches(round_id).values_list("id", flat=True))
+    info = RoundInfo(
+        id=round_id,
+        status=row[0],
+        selection_end_time=row[1],
+        match_ids=match_ids,
+        match_index={match_id: idx for idx, match_id in enumerate(match_ids)},
+    )
+    if info.selection_end_time is not None and now < info.selection_end_time:
+        with _lock:
+            # заодно выбрасываем раунды с истёкшим приёмом ставок
+            for key in [k for k, v in _rounds.items() if v.selection_end_time <= now]:
+                del _rounds[key]
+            _rounds[round_id] = info
+    return info
+
+
+def invalidate(round_id=None):
+    """Сбрасывает раунд (или весь кэш) этого процесса."""
+    with _lock:
+        if round_id is None:
+            _rounds.clear()
+        else:
+            _rounds.pop(round_id, None)
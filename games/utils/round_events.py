@@ -0,0 +1,68 @@
+"""
+Уведомления о смене статуса раунда.
+
+Движок (отдельный процесс) вызывает notify() при переходах раунда; уведомление уходит
+через pg_notify, и живая лента каждого веб-процесса (games/utils/live_feed.py) сразу
+перечитывает состояние, не дожидаясь очередного тика. Слушатель — один поток с одним
+соединением LISTEN на процесс; ожидающие клиенты соединений с БД не держат.
+"""
+import logging
+import select
+import threading
+
+import psycopg2
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "round_events"
+LISTEN_POLL_INTERVAL = 5  # секунд ожидания в select
+RECONNECT_INTERVAL = 3  # секунд до переподключения после ошибки
+
+_listener_lock = threading.Lock()
+_listener = None
+
+
+def notify(round_obj):
+    """Сообщает слушателям всех процессов о переходе раунда (доставляется при коммите)."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, f"{round_obj.id}:{round_obj.status}"])
+
+
+def start_listener(callback):
+    """Запускает поток LISTEN (один на процесс); callback() вызывается из потока на каждое уведомление."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None and _listener.is_alive():
+            return
+        _listener = threading.Thread(target=_listen, args=(callback,), name="round-events", daemon=True)
+        _listener.start()
+
+
+def _listen(callback):
+    stop = threading.Event()
+    while True:
+        try:
+            conn = psycopg2.connect(**connection.get_connection_params())
+        except Exception:
+            logger.exception("Не удалось подключиться для LISTEN %s", CHANNEL)
+            stop.wait(RECONNECT_INTERVAL)
+            continue
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            # после (пере)подключения состояние могло измениться
+            callback()
+            while True:
+                if select.select([conn], [], [], LISTEN_POLL_INTERVAL) == ([], [], []):
+                    continue
+                conn.poll()
+                if conn.notifies:
+                    conn.notifies.clear()
+                    callback()
+        except Exception:
+            logger.exception("Соединение LISTEN %s прервано", CHANNEL)
+            stop.wait(RECONNECT_INTERVAL)
+        finally:
+            conn.close()
@@ -0,0 +1,83 @@
+"""
+Готовый JSON текущего раунда для CurrentRoundView.
+
+Раунд с матчами, командами, аватарами, временем и джекпотом сериализуется один раз на версию
+(id раунда, статус, джекпот) и хранится в памяти процесса уже закодированным в байты.
+На каждый запрос остаётся один запрос к БД: версия текущего раунда и живой пул (сумма шардов).
+Пул вклеивается между готовыми кусками JSON, поэтому остаётся живым без пересборки снимка.
+"""
+import threading
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Optional
+
+from django.db.models import Prefetch, Subquery
+from rest_framework.renderers import JSONRenderer
+
+from games.models.jackpot import Jackpot
+from games.models.matchs import Match
+from games.models.rounds import Round
+from games.serializers import RoundSerializer
+from games.utils import live_pool
+
+ACTIVE_STATUSES = [Round.Status.SELECTION, Round.Status.CALCULATION, Round.Status.PAYOUT]
+
+# метка на месте live_pool при сборке снимка
+_POOL_MARK = "__live_pool__"
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: tuple  # (round_id, status, jackpot)
+    head: bytes  # JSON до значения live_pool
+    tail: bytes  # JSON после него
+
+
+_snapshot: Optional[Snapshot] = None
+_lock = threading.Lock()
+_renderer = JSONRenderer()
+_pool_field = RoundSerializer().fields["live_pool"]
+
+
+def current_round_json() -> Optional[bytes]:
+    """JSON текущего раунда (как RoundSerializer) или None, если активного раунда нет."""
+    row = (
+        Round.objects
+        .filter(status__in=ACTIVE_STATUSES)
+        .order_by("-id")
+        .annotate(
+            pool=live_pool.pool_subquery(),
+            jackpot=Subquery(Jackpot.objects.order_by("id").values("amount")[:1]),
+        )
+        .values("id", "status", "jackpot", "pool")
+        .first()
+    )
+    if row is None:
+        return None
+
+    version = (row["id"], row["status"], row["jackpot"])
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != version:
+        snapshot = _build(version)
+
+    return snapshot.head + _renderer.render(_pool_field.to_representation(row["pool"] or Decimal("0"))) + snapshot.tail
+
+
+def _build(version) -> Snapshot:
+    global _snapshot
+    round_id, _, jackpot = version
+    round_obj = (
+        Round.objects
+        .prefetch_related(
+            Prefetch("matches", queryset=Match.objects.select_related("team1", "team2").order_by("id"))
+        )
+        .get(id=round_id)
+    )
+    data = dict(RoundSerializer(round_obj, context={"jackpot": jackpot}).data)
+    data["live_pool"] = _POOL_MARK
+
+    head, tail = _renderer.render(data).split(_renderer.render(_POOL_MARK), 1)
+    snapshot = Snapshot(version=version, head=head, tail=tail)
+    with _lock:
+        _snapshot = snapshot
+    return snapshot
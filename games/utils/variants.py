@@ -0,0 +1,43 @@
+from bisect import bisect_right
+
+
+class VariantList:
+    """
+    Ленивый список вариантов для пагинации: сначала строки BetVariant (queryset),
+    затем виртуальные варианты системных купонов. Разворачивается только
+    запрошенный срез, поэтому купон на 59 049 вариантов не перебирается целиком.
+    """
+    ordered = True
+
+    def __init__(self, queryset, system_coupons, results):
+        self.queryset = queryset
+        self.system_coupons = list(system_coupons)
+        self.results = results
+        self._offsets = None
+
+    def _get_offsets(self):
+        # offsets[i] — индекс первого варианта i-го сегмента (0 — строки queryset)
+        if self._offsets is None:
+            offsets = [0, self.queryset.count()]
+            for coupon in self.system_coupons:
+                offsets.append(offsets[-1] + coupon.num_variants)
+            self._offsets = offsets
+        return self._offsets
+
+    def __len__(self):
+        return self._get_offsets()[-1]
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+
+        start, stop, _ = item.indices(len(self))
+        offsets = self._get_offsets()
+        items = []
+        if start < offsets[1]:
+            items.extend(self.queryset[start:min(stop, offsets[1])])
+        for pos in range(max(start, offsets[1]), stop):
+            segment = bisect_right(offsets, pos) - 1
+            coupon = self.system_coupons[segment - 1]
+            items.append(coupon.get_variant(pos - offsets[segment], self.results))
+        return items
@@ -1,28 +1,35 @@
-from itertools import product
 from decimal import Decimal
 
+from django.conf import settings
+from django.db import connection, transaction
 from rest_framework.views import APIView
-from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ValidationError, NotFound
 
 from games.models.rounds import Round
-from games.models.bets import BetCoupon, BetVariant, SelectedOutcome
+from games.utils import bet_feed, bet_queue, idempotency, outcome_codes, round_cache
+from games.utils.coupons import CouponDraft, insert_coupons
+from users import ledger
 
 
-OUTCOME_MAP = {
-    "1": SelectedOutcome.Outcome.WIN1,
-    "X": SelectedOutcome.Outcome.DRAW,
-    "2": SelectedOutcome.Outcome.WIN2,
-}
+OUTCOME_MAP = outcome_codes.DIGIT_BY_RESULT
+
+# Купоны от стольких вариантов храним как системные: только маска выбора, без строк BetVariant
+SYSTEM_BET_MIN_VARIANTS = 32
+
+
+# Сколько купонов можно передать в одном пакетном запросе
+MAX_BATCH_COUPONS = 50
 
 
 class PlaceBetView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        user = request.user
+        # повтор запроса с тем же Idempotency-Key получает сохранённый ответ
+        return idempotency.idempotent_response(request, "bet", lambda: self.place_bet(request))
 
+    def place_bet(self, request) -> dict:
         # входные данные
         round_id = request.data.get("round_id")
         stake_per_variant = request.data.get("stake_per_variant")
@@ -32,95 +39,174 @@ class PlaceBetView(APIView):
         if not round_id or not stake_per_variant or not predictions:
             raise ValidationError("Не все обязательные поля переданы.")
 
-        try:
-            stake_per_variant = Decimal(stake_per_variant)
-        except:
-            raise ValidationError("Ставка должна быть числом.")
+        round_info = get_open_round(round_id)
+        draft = build_coupon(round_info, stake_per_variant, predictions)
+        balance = place_coupons(request.user, round_info, [draft])
 
-        if stake_per_variant <= 0:
-            raise ValidationError("Ставка на вариант должна быть положительной.")
+        return {
+            "status": "ok",
+            "balance_left": str(balance)
+        }
 
-        # проверяем раунд
-        try:
-            round_obj = Round.objects.get(id=round_id, status=Round.Status.SELECTION)
-        except Round.DoesNotExist:
-            raise ValidationError("Нет доступного раунда для ставок.")
 
-        # проверяем количество матчей
-        if len(predictions) != 10:
-            raise ValidationError("Необходимо выбрать исходы во всех 10 матчах.")
+class PlaceBetBatchView(APIView):
+    """
+    Несколько купонов одного раунда за один запрос: {"round_id", "coupons": [{stake_per_variant, predictions}]}.
+    Все купоны проверяются вместе, баланс проверяется один раз по общей сумме,
+    купоны и варианты пишутся одной пачкой, пул раунда увеличивается один раз.
+    """
+    permission_classes = [IsAuthenticated]
 
-        # Собираем матчи
-        valid_matches = set(round_obj.matches.values_list("id", flat=True))
+    def post(self, request):
+        return idempotency.idempotent_response(request, "bet_batch", lambda: self.place_bets(request))
+
+    def place_bets(self, request) -> dict:
+        round_id = request.data.get("round_id")
+        coupons = request.data.get("coupons")
 
-        for match_id, outcomes in predictions.items():
+        if not round_id or not coupons or not isinstance(coupons, list):
+            raise ValidationError("Не все обязательные поля переданы.")
+        if len(coupons) > MAX_BATCH_COUPONS:
+            raise ValidationError(f"Не больше {MAX_BATCH_COUPONS} купонов в одном запросе.")
+
+        round_info = get_open_round(round_id)
+
+        drafts = []
+        for idx, coupon in enumerate(coupons):
             try:
-                match_id = int(match_id)
-            except ValueError:
-                raise ValidationError(f"Некорректный match_id: {match_id}")
-
-            if match_id not in valid_matches:
-                raise ValidationError(f"Матч {match_id} не относится к этому раунду.")
-
-        # строим комбинации
-        grouped = []
-        for match_id, outcomes in predictions.items():
-            if not outcomes:
-                raise ValidationError(f"Матч {match_id}: нужно выбрать хотя бы один исход.")
-
-            seen = set()
-            valid = []
-            for o in outcomes:
-                if o in OUTCOME_MAP and o not in seen:
-                    valid.append(o)
-                    seen.add(o)
-
-            if not valid:
-                raise ValidationError(f"Матч {match_id}: некорректные исходы.")
-
-            grouped.append([(int(match_id), outcome) for outcome in valid])
-        combinations = list(product(*grouped))
-        if not combinations:
-            raise ValidationError("Не удалось сформировать варианты ставок.")
-
-        num_variants = len(combinations)
-        total_amount = stake_per_variant * num_variants
-
-        # проверяем баланс
-        if user.balance_cached < total_amount:
-            raise ValidationError("Недостаточно средств для ставки.")
+                if not isinstance(coupon, dict) or not coupon.get("stake_per_variant") or not coupon.get("predictions"):
+                    raise ValidationError("Не все обязательные поля переданы.")
+                drafts.append(build_coupon(round_info, coupon["stake_per_variant"], coupon["predictions"]))
+            except ValidationError as e:
+                raise ValidationError({"coupons": {idx: e.detail}})
 
-        # создаём купон
-        coupon = BetCoupon.objects.create(
-            user=user,
-            round=round_obj,
-            amount_total=total_amount,
-            num_variants=num_variants
-        )
+        balance = place_coupons(request.user, round_info, drafts)
 
-        # создаём варианты
-        variant_objs = [BetVariant(coupon=coupon) for _ in combinations]
-        BetVariant.objects.bulk_create(variant_objs)
-
-        # получаем созданные варианты
-        variant_objs = list(BetVariant.objects.filter(coupon=coupon).order_by("id"))
-
-        # создаём исходы
-        outcome_objs = []
-        for variant, combo in zip(variant_objs, combinations):
-            for match_id, outcome_raw in combo:
-                outcome_objs.append(SelectedOutcome(
-                    variant=variant,
-                    match_id=match_id,
-                    outcome=OUTCOME_MAP[outcome_raw]
-                ))
-        SelectedOutcome.objects.bulk_create(outcome_objs)
-
-        # списываем баланс
-        user.balance_cached -= total_amount
-        user.save(update_fields=["balance_cached"])
-
-        return Response({
+        return {
             "status": "ok",
-            "balance_left": str(user.balance_cached)
-        })
+            "coupons": len(drafts),
+            "balance_left": str(balance)
+        }
+
+
+def get_open_round(round_id) -> round_cache.RoundInfo:
+    # проверяем раунд (кэш процесса: статус, конец приёма ставок, матчи)
+    try:
+        round_info = round_cache.get_open_round(int(round_id))
+    except (TypeError, ValueError):
+        round_info = None
+    if round_info is None:
+        raise ValidationError("Нет доступного раунда для ставок.")
+    return round_info
+
+
+def build_coupon(round_info, stake_per_variant, predictions) -> CouponDraft:
+    """Проверяет ставку и выбор по матчам, разворачивает купон в коды вариантов (или маску)."""
+    try:
+        stake_per_variant = Decimal(stake_per_variant)
+    except:
+        raise ValidationError("Ставка должна быть числом.")
+
+    if stake_per_variant <= 0:
+        raise ValidationError("Ставка на вариант должна быть положительной.")
+
+    # проверяем количество матчей
+    if not isinstance(predictions, dict) or len(predictions) != outcome_codes.MATCHES_PER_ROUND:
+        raise ValidationError("Необходимо выбрать исходы во всех 10 матчах.")
+
+    # позиция матча в раунде = разряд в коде варианта
+    match_index = round_info.match_index
+
+    choices = [None] * len(match_index)
+    for match_id, outcomes in predictions.items():
+        try:
+            match_id = int(match_id)
+        except ValueError:
+            raise ValidationError(f"Некорректный match_id: {match_id}")
+
+        if match_id not in match_index:
+            raise ValidationError(f"Матч {match_id} не относится к этому раунду.")
+
+        if not outcomes:
+            raise ValidationError(f"Матч {match_id}: нужно выбрать хотя бы один исход.")
+
+        valid = []
+        for o in outcomes:
+            if o in OUTCOME_MAP and OUTCOME_MAP[o] not in valid:
+                valid.append(OUTCOME_MAP[o])
+
+        if not valid:
+            raise ValidationError(f"Матч {match_id}: некорректные исходы.")
+
+        choices[match_index[match_id]] = valid
+
+    if any(c is None for c in choices):
+        raise ValidationError("Необходимо выбрать исходы во всех 10 матчах.")
+
+    num_variants = outcome_codes.count_variants(choices)
+
+    # системный купон хранит только маску выбора, варианты разворачиваются при чтении
+    is_system = num_variants >= SYSTEM_BET_MIN_VARIANTS
+
+    return CouponDraft(
+        amount_total=stake_per_variant * num_variants,
+        num_variants=num_variants,
+        selection_mask=outcome_codes.pack_mask(choices) if is_system else None,
+        codes=None if is_system else outcome_codes.expand_codes(choices),
+    )
+
+
+def place_coupons(user, round_info, drafts) -> Decimal:
+    """
+    Списывает общую сумму купонов и записывает их (или отдаёт очереди приёма ставок).
+    Возвращает остаток баланса.
+    """
+    total_amount = sum((d.amount_total for d in drafts), Decimal("0"))
+
+    with transaction.atomic():
+        # раунд держится в SELECTION до конца транзакции: start_calculation ждёт её завершения
+        if not lock_round_for_bets(round_info.id):
+            raise ValidationError("Нет доступного раунда для ставок.")
+
+        # проверяем баланс: списания одного пользователя идут по очереди (advisory-lock)
+        balance = ledger.lock_balance(user.id)
+        if balance < total_amount:
+            raise ValidationError("Недостаточно средств для ставки.")
+
+        if settings.BET_QUEUE_ENABLED:
+            # резервируем суммы, купоны запишет очередь приёма ставок пачкой
+            entries = ledger.add_bet_entries(
+                user.id, round_info.id, [(None, d.amount_total) for d in drafts], is_pending=True
+            )
+        else:
+            # купоны, варианты (исходы хранятся в outcome_code) и пул раунда — одной пачкой
+            coupons = insert_coupons([(user.id, round_info.id, d) for d in drafts])
+            # списываем баланс записями в журнал, строку пользователя не трогаем
+            ledger.add_bet_entries(
+                user.id, round_info.id, [(c.id, d.amount_total) for c, d in zip(coupons, drafts)]
+            )
+            # лента последних ставок процесса пополняется после коммита
+            accepted = [(c.id, user.username, d.amount_total, d.num_variants) for c, d in zip(coupons, drafts)]
+            transaction.on_commit(lambda: bet_feed.feed.append(round_info.id, accepted))
+
+    if settings.BET_QUEUE_ENABLED:
+        for entry, draft in zip(entries, drafts):
+            bet_queue.submit(bet_queue.PendingBet(
+                entry_id=entry.id, user_id=user.id, round_id=round_info.id, coupon=draft, username=user.username
+            ))
+
+    return balance - total_amount
+
+
+def lock_round_for_bets(round_id) -> bool:
+    """
+    FOR SHARE на строку раунда: ставки не блокируют друг друга, но смена статуса
+    (start_calculation) дождётся их транзакций. True — раунд принимает ставки.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT status FROM {Round._meta.db_table} WHERE id = %s FOR SHARE",
+            [round_id],
+        )
+        row = cursor.fetchone()
+    return row is not None and row[0] == Round.Status.SELECTION
@@ -0,0 +1,109 @@
+import json
+import time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+
+from games.utils.live_feed import feed
+
+HEARTBEAT_INTERVAL = 15  # секунд: комментарий в поток, чтобы прокси не закрывали соединение
+
+WAIT_TIMEOUT = 25  # секунд ожидания long-poll по умолчанию
+MAX_WAIT_TIMEOUT = 55  # не дольше типичного таймаута прокси
+FIRST_STATE_TIMEOUT = 5  # секунд на первый опрос, если лента только запустилась
+
+
+class CurrentRoundStreamView(View):
+    """
+    Server-Sent Events текущего раунда: round (смена статуса), pool (живой пул), jackpot, bets (новые ставки).
+    Работает под ASGI (config/asgi.py): соединение держит корутина, а не поток воркера.
+    Вместо опроса current_round/, current_round/pool/ и variants/ клиент подписывается один раз.
+    """
+
+    async def get(self, request):
+        response = StreamingHttpResponse(_event_stream(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # nginx: не буферизовать поток
+        return response
+
+
+async def _event_stream():
+    subscriber = feed.subscribe()
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            events = await subscriber.next_events(HEARTBEAT_INTERVAL)
+            if events is None:
+                yield ": ping\n\n"
+                continue
+            yield "".join(
+                f"event: {name}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+                for name, data in events.items()
+            )
+    finally:
+        # клиент отключился (ASGI отменяет генератор)
+        feed.unsubscribe(subscriber)
+
+
+class CurrentRoundWaitView(View):
+    """
+    Long-poll для клиентов без SSE: ?round_id=&status=&pool_version=&jackpot_version=&timeout=
+    Отвечает сразу, если текущее состояние отличается от известного клиенту, иначе ждёт
+    изменения (или timeout) и возвращает только изменившиеся части: round, pool, jackpot.
+    Джекпот сравнивается отдельно от раунда: он меняется при расчёте предыдущего раунда,
+    когда текущий уже принимает ставки.
+    Ожидание — корутина на живой ленте процесса: ни потока, ни соединения с БД не держит.
+    """
+
+    async def get(self, request):
+        params = request.GET
+        known = {
+            "round_id": _int_or_none(params.get("round_id")),
+            "status": params.get("status") or None,
+            "pool_version": _int_or_none(params.get("pool_version")),
+            "jackpot_version": _int_or_none(params.get("jackpot_version")),
+        }
+        timeout = _int_or_none(params.get("timeout"))
+        timeout = WAIT_TIMEOUT if timeout is None else max(0, min(MAX_WAIT_TIMEOUT, timeout))
+
+        subscriber = feed.subscribe()
+        try:
+            deadline = time.monotonic() + timeout
+            if not feed.state:
+                # лента только запустилась — ждём первый опрос
+                await subscriber.next_events(FIRST_STATE_TIMEOUT)
+
+            while True:
+                delta = _delta(feed.state, known)
+                remaining = deadline - time.monotonic()
+                if delta or remaining <= 0:
+                    break
+                await subscriber.next_events(remaining)
+        finally:
+            feed.unsubscribe(subscriber)
+
+        return JsonResponse({"changed": bool(delta), **delta})
+
+
+def _delta(state, known) -> dict:
+    delta = {}
+    round_state = state.get("round")
+    if round_state is None:
+        return delta
+    if round_state["id"] != known["round_id"] or round_state["status"] != known["status"]:
+        delta["round"] = round_state
+    pool = state.get("pool")
+    if pool is not None and (pool["id"] != known["round_id"] or pool["pool_version"] != known["pool_version"]):
+        delta["pool"] = pool
+    jackpot = state.get("jackpot")
+    if jackpot is not None and jackpot["jackpot_version"] != known["jackpot_version"]:
+        delta["jackpot"] = jackpot
+    return delta
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
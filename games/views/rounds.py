@@ -1,33 +1,33 @@
-from django.db.models import QuerySet, Prefetch
+from collections import defaultdict
+from decimal import Decimal
+from itertools import islice
+
+from django.db.models import QuerySet
+from django.http import HttpResponse
 from rest_framework import status
 from rest_framework.exceptions import NotFound, PermissionDenied
-from rest_framework.generics import RetrieveAPIView, ListAPIView, get_object_or_404
+from rest_framework.generics import ListAPIView, get_object_or_404
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from games.models.bets import BetCoupon, BetVariant, SelectedOutcome
+from games.models.bets import BetCoupon, BetVariant, VirtualVariant
 from games.models.rounds import Round
-from games.serializers import RoundSerializer, RoundHistorySerializer, BetVariantSerializer, RoundStatsSerializer, \
+from games.serializers import RoundHistorySerializer, BetVariantSerializer, RoundStatsSerializer, \
     UserBetVariantSerializer
+from games.utils import bet_feed, live_pool, outcome_codes, round_snapshot
+from games.utils.variants import VariantList
 
 
-class CurrentRoundView(RetrieveAPIView):
-    serializer_class = RoundSerializer
+class CurrentRoundView(APIView):
     permission_classes = [AllowAny]
 
-    def get_object(self):
-        obj = Round.objects.filter(
-            status__in=[
-                Round.Status.SELECTION,
-                Round.Status.CALCULATION,
-                Round.Status.PAYOUT
-            ]
-        ).order_by("-id").first()
-
-        if not obj:
+    def get(self, request):
+        # готовые байты снимка раунда (games/utils/round_snapshot.py), живой пул — на каждый запрос
+        content = round_snapshot.current_round_json()
+        if content is None:
             raise NotFound("Нет активного раунда (selection/calculation/payout)")
-        return obj
+        return HttpResponse(content, content_type="application/json")
 
 
 class CurrentRoundPoolView(APIView):
@@ -44,7 +44,8 @@ class CurrentRoundPoolView(APIView):
                 ]
             )
             .order_by("-id")
-            .values("id", "live_pool")   # ⚡ теперь берём из Round
+            .annotate(pool=live_pool.pool_subquery())   # ⚡ сумма шардов пула, без ожидания flush
+            .values("id", "pool")
             .first()
         )
 
@@ -53,7 +54,7 @@ class CurrentRoundPoolView(APIView):
 
         return Response({
             "id": round_obj["id"],
-            "live_pool": round_obj["live_pool"],   # возвращаем живой пул
+            "live_pool": round_obj["pool"],   # возвращаем живой пул
         })
 
 
@@ -79,53 +80,149 @@ class LastBetVariantsView(ListAPIView):
         return str(raw).strip().lower() in {"1", "true", "yes", "on"}
 
     def _current_round_id(self):
-        obj = (
-            Round.objects
-            .filter(status__in=[Round.Status.SELECTION, Round.Status.CALCULATION, Round.Status.PAYOUT])
-            .order_by("-id")
-            .values_list("id", flat=True)
-            .first()
+        # один запрос на запрос клиента: id нужен и get_queryset, и list
+        if not hasattr(self, "_current_round_id_cached"):
+            self._current_round_id_cached = (
+                Round.objects
+                .filter(status__in=[Round.Status.SELECTION, Round.Status.CALCULATION, Round.Status.PAYOUT])
+                .order_by("-id")
+                .values_list("id", flat=True)
+                .first()
+            )
+        return self._current_round_id_cached  # может быть None
+
+    def _round_results(self, round_id):
+        return outcome_codes.result_digits(
+            list(outcome_codes.round_matches(round_id).values_list("result", flat=True))
+        )
+
+    def _latest_variants(self, round_id, limit):
+        # Последние варианты = варианты последних купонов: у строк BetVariant берём
+        # свежие id, у системных купонов — виртуальные варианты с конца перебора.
+        coupons = list(
+            BetCoupon.objects
+            .filter(round_id=round_id)
+            .select_related("user")
+            .order_by("-id")[:limit]
+        )
+        rows_by_coupon = defaultdict(list)
+        rows = (
+            BetVariant.objects
+            .select_related("coupon__user", "coupon")
+            .filter(coupon_id__in=[c.id for c in coupons if not c.is_system])
+            .order_by("-id")[:limit]
+        )
+        for v in rows:
+            rows_by_coupon[v.coupon_id].append(v)
+
+        results = self._round_results(round_id) if any(c.is_system for c in coupons) else None
+        items = []
+        for coupon in coupons:
+            need = limit - len(items)
+            if need <= 0:
+                break
+            if coupon.is_system:
+                last = coupon.num_variants - 1
+                items.extend(coupon.get_variant(idx, results) for idx in range(last, max(-1, last - need), -1))
+            else:
+                items.extend(rows_by_coupon[coupon.id][:need])
+        return items
+
+    def _best_user_variants(self, round_id, limit):
+        rows = list(
+            BetVariant.objects
+            .select_related("coupon__user", "coupon")
+            .filter(coupon__round_id=round_id, coupon__user=self.request.user)
+            .order_by("-matched_count", "-id")[:limit]
+        )
+        system_coupons = list(
+            BetCoupon.objects
+            .filter(round_id=round_id, user=self.request.user, selection_mask__isnull=False)
+            .select_related("user")
+            .order_by("id")
         )
-        return obj  # может быть None
+        if not system_coupons:
+            return rows
+
+        # Варианты всех купонов не перебираются: по гистограмме совпадений находим лучшие
+        # matched_count и разворачиваем только варианты с ними (до limit штук).
+        # Пока результатов нет, у всех вариантов 0 совпадений — берутся первые limit.
+        results = self._round_results(round_id)
+        choices = {coupon.id: coupon.get_choices() for coupon in system_coupons}
+        histograms = {
+            coupon.id: outcome_codes.matched_histogram(choices[coupon.id], results) for coupon in system_coupons
+        }
+        virtual = []
+        for k in range(max(len(h) for h in histograms.values()) - 1, -1, -1):
+            for coupon in system_coupons:
+                need = limit - len(virtual)
+                if need <= 0:
+                    break
+                hist = histograms[coupon.id]
+                if k >= len(hist) or not hist[k]:
+                    continue
+                codes = outcome_codes.iter_matched_codes(choices[coupon.id], results, k)
+                virtual.extend(VirtualVariant(coupon, code, k) for code in islice(codes, min(need, hist[k])))
+        return sorted(
+            rows + virtual,
+            key=lambda v: (v.matched_count, v.coupon_id, v.id or 0),
+            reverse=True,
+        )[:limit]
 
     def get_queryset(self):
         current_round_id = self._current_round_id()
         if current_round_id is None:
             return BetVariant.objects.none()
 
-        qs = (
-            BetVariant.objects
-            .select_related("coupon__user", "coupon")
-            .filter(coupon__round_id=current_round_id)
-        )
-
         if self._parse_is_me():
             if not self.request.user.is_authenticated:
                 raise PermissionDenied("Требуется авторизация для is_me=true")
-            qs = qs.filter(coupon__user=self.request.user).order_by("-matched_count", "-id")
+            qs = self._best_user_variants(current_round_id, self._parse_limit())
         else:
-            qs = qs.order_by("-id")
+            qs = self._latest_variants(current_round_id, self._parse_limit())
 
-        qs = qs[: self._parse_limit()]
-
-        qs = list(qs)  # чтобы можно было узнать len
         total = len(qs)
         for idx, obj in enumerate(qs, start=1):
             obj.position = total - idx + 1
         return qs
 
     def list(self, request, *args, **kwargs):
+        if not self._parse_is_me():
+            round_id, round_status = bet_feed.feed.current()
+            if round_status == Round.Status.SELECTION:
+                # пока идёт приём ставок выигрышей нет: лента целиком из памяти процесса
+                return self._feed_response(round_id)
+
         response = super().list(request, *args, **kwargs)
 
         current_round_id = self._current_round_id()
-        if current_round_id:
-            total_for_round = BetVariant.objects.filter(coupon__round_id=current_round_id).count()
-        else:
-            total_for_round = 0
+        # счётчик вариантов в шардах пула (с виртуальными вариантами системных купонов)
+        total_for_round = live_pool.get_variants(current_round_id) if current_round_id else 0
 
         response.data["total_variants"] = total_for_round
         return response
 
+    def _feed_response(self, round_id):
+        latest = bet_feed.feed.latest(self._parse_limit())
+        # то же представление, что у BetVariantSerializer для варианта без выигрыша
+        zero = BetVariantSerializer().fields["win_amount"].to_representation(Decimal("0"))
+        total = len(latest)
+        items = [
+            {
+                "position": total - idx,
+                "username": username,
+                "bet_amount": bet,
+                "win_amount": zero,
+                "win_multiplier": zero,
+            }
+            for idx, (username, bet) in enumerate(latest)
+        ]
+        page = self.paginate_queryset(items)
+        response = self.get_paginated_response(page) if page is not None else Response(items)
+        response.data["total_variants"] = live_pool.get_variants(round_id)
+        return response
+
+
 class RoundHistoryView(ListAPIView):
     serializer_class = RoundHistorySerializer
     permission_classes = [AllowAny]
@@ -157,7 +254,13 @@ class RoundStatsView(APIView):
 
         serializer = RoundStatsSerializer(round_obj.stats)
         return Response({
-            "round": {"id": round_obj.id, "status": round_obj.status},
+            "round": {
+                "id": round_obj.id,
+                "status": round_obj.status,
+                # раскрытый сид: результаты проверяются по game_hash (games/utils/fairness.py)
+                "game_hash": round_obj.game_hash,
+                "server_seed": round_obj.server_seed,
+            },
             **serializer.data
         })
 
@@ -166,33 +269,49 @@ class MyVariantsInRoundView(ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = UserBetVariantSerializer
 
+    def get_round(self):
+        if not hasattr(self, "_round_obj"):
+            try:
+                self._round_obj = Round.objects.only("id").get(pk=self.kwargs["pk"])
+            except Round.DoesNotExist:
+                raise NotFound("Раунд не найден")
+        return self._round_obj
+
+    def get_round_matches(self):
+        # матчи раунда нужны один раз на запрос — для раскодирования outcome_code
+        if not hasattr(self, "_round_matches"):
+            self._round_matches = list(
+                outcome_codes.round_matches(self.get_round().id)
+                .select_related("team1", "team2")
+                .only("id", "result", "team1__name", "team2__name")
+            )
+        return self._round_matches
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["round_matches"] = self.get_round_matches()
+        return context
+
     def get_queryset(self):
-        round_id = self.kwargs["pk"]
-        try:
-            round_obj = Round.objects.only("id").get(pk=round_id)
-        except Round.DoesNotExist:
-            raise NotFound("Раунд не найден")
+        round_obj = self.get_round()
 
         # Все варианты текущего пользователя в этом раунде
         qs = (
             BetVariant.objects
             .filter(coupon__round=round_obj, coupon__user=self.request.user)
             .select_related("coupon")  # для bet_amount
-            .prefetch_related(
-                Prefetch(
-                    "selected",
-                    queryset=SelectedOutcome.objects.select_related(
-                        "match", "match__team1", "match__team2"
-                    ).only(
-                        "id", "outcome",
-                        "match__id", "match__result",
-                        "match__team1__name", "match__team2__name",
-                    )
-                )
-            )
             .only(
-                "id", "matched_count", "win_amount", "win_multiplier", "is_win",
+                "id", "outcome_code", "matched_count", "win_amount", "win_multiplier", "is_win",
                 "coupon__amount_total", "coupon__num_variants",
             )
+            .order_by("id")
+        )
+
+        # системные купоны: варианты виртуальные, разворачивается только текущая страница
+        system_coupons = (
+            BetCoupon.objects
+            .filter(round=round_obj, user=self.request.user, selection_mask__isnull=False)
+            .order_by("id")
         )
-        return qs
\ No newline at end of file
+        results = outcome_codes.result_digits([m.result for m in self.get_round_matches()])
+        return VariantList(qs, system_coupons, results)
@@ -9,9 +9,10 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from games.models.bets import BetCoupon, BetVariant, SelectedOutcome
+from games.models.bets import BetCoupon, BetVariant, VirtualVariant
 from games.models.wins import BiggestWin
 from games.serializers import BiggestWinSerializer, BetVariantTopSerializer
+from games.utils import outcome_codes
 
 
 class BiggestWinView(RetrieveAPIView):
@@ -30,20 +31,30 @@ class TopWinningVariantsView(ListAPIView):
     def get_queryset(self):
         one_week_ago = timezone.now() - timedelta(days=7)
 
-        return (
+        top = list(
             BetVariant.objects
             .filter(coupon__created_at__gte=one_week_ago, win_amount__gt=0)
             .select_related("coupon__user", "coupon")
             .order_by("-win_amount", "-id")[:10]
         )
 
-
-
-OUTCOME_TO_STR = {
-    SelectedOutcome.Outcome.WIN1: "1",
-    SelectedOutcome.Outcome.DRAW: "X",
-    SelectedOutcome.Outcome.WIN2: "2",
-}
+        # Выигрышные варианты системных купонов лежат в variant_wins купона.
+        # Вариант не может выиграть больше купона, поэтому идём по купонам
+        # от большего выигрыша и останавливаемся, когда они уже не попадают в топ.
+        system_coupons = (
+            BetCoupon.objects
+            .filter(created_at__gte=one_week_ago, is_winner=True, selection_mask__isnull=False)
+            .select_related("user")
+            .order_by("-win_amount_total", "-id")
+        )
+        for coupon in system_coupons.iterator():
+            if len(top) >= 10 and coupon.win_amount_total < top[-1].win_amount:
+                break
+            for matched, win in coupon.variant_wins.items():
+                if Decimal(win["win_amount"]) > 0:
+                    top.extend(VirtualVariant(coupon, None, int(matched)) for _ in range(min(win["variants"], 10)))
+            top = sorted(top, key=lambda v: (v.win_amount, v.coupon_id, v.id or 0), reverse=True)[:10]
+        return top
 
 
 
@@ -62,49 +73,57 @@ class MyWinCouponView(APIView):
         # сразу помечаем ВСЕ такие купоны как просмотренные
         qs.update(is_seen=True)
 
-        # агрегаты по вариантам купона
-        agg = (
-            BetVariant.objects
-            .filter(coupon=coupon)
-            .aggregate(best_matched_count=Max("matched_count"))
+        # матчи с выбором и результатом + аватары
+        round_matches = list(
+            outcome_codes.round_matches(coupon.round_id)
+            .select_related("team1", "team2")
+            .only("id", "result", "team1__name", "team1__avatar", "team2__name", "team2__avatar")
         )
-        best_matched_count = agg["best_matched_count"] or 0
 
-        # матчи с выбором и результатом + аватары
-        per_match = {}
-        so_rows = (
-            SelectedOutcome.objects
-            .filter(variant__coupon=coupon)
-            .select_related("match__team1", "match__team2")
-            .values_list(
-                "match_id",
-                "match__team1__name", "match__team1__avatar",
-                "match__team2__name", "match__team2__avatar",
-                "match__result",
-                "outcome",
+        if coupon.is_system:
+            choices_by_idx = [set(digits) for digits in coupon.get_choices()]
+            # лучший вариант системного купона угадывает везде, где результат был среди выбранных
+            results = outcome_codes.result_digits([m.result for m in round_matches])
+            best_matched_count = sum(
+                1 for expected, digits in zip(results, choices_by_idx) if expected in digits
             )
-        )
+        else:
+            # агрегаты по вариантам купона
+            agg = (
+                BetVariant.objects
+                .filter(coupon=coupon)
+                .aggregate(best_matched_count=Max("matched_count"))
+            )
+            best_matched_count = agg["best_matched_count"] or 0
+
+            codes = (
+                BetVariant.objects
+                .filter(coupon=coupon, outcome_code__isnull=False)
+                .values_list("outcome_code", flat=True)
+            )
+            choices_by_idx = [set() for _ in round_matches]
+            for code in codes.iterator():
+                for idx, digit in enumerate(outcome_codes.decode(code, len(round_matches))):
+                    choices_by_idx[idx].add(digit)
 
-        for match_id, t1, t1_avatar, t2, t2_avatar, match_result, outcome_enum in so_rows:
-            entry = per_match.get(match_id)
-            if entry is None:
-                entry = {
-                    "title": f"{t1} vs {t2}",
-                    "team1": {
-                        "name": t1,
-                        "avatar": request.build_absolute_uri(t1_avatar) if t1_avatar else None,
-                    },
-                    "team2": {
-                        "name": t2,
-                        "avatar": request.build_absolute_uri(t2_avatar) if t2_avatar else None,
-                    },
-                    "choices": set(),
-                    "result": match_result if match_result in {"1", "X", "2"} else None,
-                }
-                per_match[match_id] = entry
-            if entry["result"] is None and match_result in {"1", "X", "2"}:
-                entry["result"] = match_result
-            entry["choices"].add(OUTCOME_TO_STR[outcome_enum])
+        per_match = {}
+        for m, digits in zip(round_matches, choices_by_idx):
+            if not digits:
+                continue
+            t1_avatar, t2_avatar = m.team1.avatar, m.team2.avatar
+            per_match[m.id] = {
+                "title": f"{m.team1.name} vs {m.team2.name}",
+                "team1": {
+                    "name": m.team1.name,
+                    "avatar": request.build_absolute_uri(t1_avatar) if t1_avatar else None,
+                },
+                "team2": {
+                    "name": m.team2.name,
+                    "avatar": request.build_absolute_uri(t2_avatar) if t2_avatar else None,
+                },
+                "choices": {outcome_codes.RESULT_BY_DIGIT[d].value for d in digits},
+                "result": m.result if m.result in {"1", "X", "2"} else None,
+            }
 
         matches = {
             str(mid): {
@@ -1,4 +1,2 @@
 #!/bin/bash
-while true; do
-    python manage.py play_round
-done
\ No newline at end of file
+exec python manage.py run_engine
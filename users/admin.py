@@ -1,16 +1,29 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from users.models import CustomUser, ColorInterval
+from users import ledger
+from users.models import CustomUser, ColorInterval, BalanceEntry
 
 
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
     model = CustomUser
     fieldsets = UserAdmin.fieldsets + (
-        ('Дополнительно', {'fields': ('balance_cached',)}),
+        ('Дополнительно', {'fields': ('balance_cached', 'current_balance')}),
     )
-    readonly_fields = ('balance_cached',)
+    readonly_fields = ('balance_cached', 'current_balance')
+
+    @admin.display(description="Текущий баланс")
+    def current_balance(self, obj):
+        return ledger.get_balance(obj.id)
+
+
+@admin.register(BalanceEntry)
+class BalanceEntryAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "amount", "reason", "coupon_id", "is_applied", "created_at")
+    list_filter = ("reason", "is_applied")
+    search_fields = ("user__username", "coupon_id")
+    raw_id_fields = ("user",)
 
 
 @admin.register(ColorInterval)
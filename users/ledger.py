@@ -0,0 +1,132 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+
+from users.models import BalanceEntry
+
+# Пространство ключей pg_advisory_xact_lock для списаний с баланса
+BALANCE_LOCK_CLASS = 7301
+
+COMPACT_INTERVAL = 5  # секунд между сжатиями журнала (движок и compact_balances --loop)
+
+
+def get_balance(user_id) -> Decimal:
+    """Текущий баланс: снимок balance_cached + неучтённые записи журнала (один запрос)."""
+    User = get_user_model()
+    balance = (
+        User.objects
+        .filter(id=user_id)
+        .annotate(
+            pending=Coalesce(
+                Sum("balance_entries__amount", filter=Q(balance_entries__is_applied=False)),
+                Decimal("0.00"),
+            )
+        )
+        .values_list("balance_cached", "pending")
+        .first()
+    )
+    if balance is None:
+        return Decimal("0.00")
+    return balance[0] + balance[1]
+
+
+def lock_balance(user_id) -> Decimal:
+    """
+    Берёт транзакционный advisory-lock пользователя и возвращает его текущий баланс.
+    Вызывать внутри transaction.atomic(): списания одного пользователя выполняются
+    по очереди (нет двойной траты), строка пользователя при этом не блокируется,
+    поэтому выплаты и сжатие журнала идут параллельно со ставками.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [BALANCE_LOCK_CLASS, user_id & 0x7FFFFFFF])
+    return get_balance(user_id)
+
+
+def add_entries(rows, reason: str, round_id=None):
+    """Пакетная запись журнала: rows — итерируемое (user_id, amount)."""
+    BalanceEntry.objects.bulk_create(
+        [
+            BalanceEntry(user_id=user_id, amount=amount, reason=reason, round_id=round_id)
+            for user_id, amount in rows
+            if amount
+        ],
+        batch_size=5_000,
+    )
+
+
+def add_bet_entries(user_id, round_id, coupons, is_pending=False) -> list:
+    """
+    Списания за купоны одним INSERT: coupons — (coupon_id, amount_total).
+    is_pending=True — резервы очереди приёма ставок (coupon_id проставит очередь).
+    """
+    return BalanceEntry.objects.bulk_create([
+        BalanceEntry(
+            user_id=user_id,
+            amount=-amount,
+            reason=BalanceEntry.Reason.BET,
+            round_id=round_id,
+            coupon_id=coupon_id,
+            is_pending=is_pending,
+        )
+        for coupon_id, amount in coupons
+    ])
+
+
+def has_pending(round_id) -> bool:
+    """Есть ли резервы ставок раунда, купоны которых ещё не записаны."""
+    return BalanceEntry.objects.filter(round_id=round_id, is_pending=True).exists()
+
+
+def refund_pending(round_id) -> int:
+    """
+    Возвращает деньги по резервам раунда, которые так и не стали купонами.
+    Резервы, которые прямо сейчас записывает очередь (заблокированы), пропускаются.
+    """
+    with transaction.atomic():
+        stale = list(
+            BalanceEntry.objects
+            .select_for_update(skip_locked=True)
+            .filter(round_id=round_id, is_pending=True)
+        )
+        if not stale:
+            return 0
+        BalanceEntry.objects.bulk_create([
+            BalanceEntry(user_id=e.user_id, amount=-e.amount, reason=BalanceEntry.Reason.REFUND, round_id=round_id)
+            for e in stale
+        ])
+        BalanceEntry.objects.filter(id__in=[e.id for e in stale]).update(is_pending=False)
+    return len(stale)
+
+
+def compact_balances() -> int:
+    """
+    Переносит неучтённые записи журнала в balance_cached.
+    Один оператор: записи помечаются учтёнными и их суммы прибавляются к снимку
+    в одном снимке данных, поэтому запись, вставленная во время сжатия,
+    не теряется и не учитывается дважды. Возвращает число обновлённых пользователей.
+    """
+    User = get_user_model()
+    qn = connection.ops.quote_name
+    users = qn(User._meta.db_table)
+    entries = qn(BalanceEntry._meta.db_table)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                UPDATE {entries} SET is_applied = true
+                WHERE is_applied = false
+                RETURNING user_id, amount
+            ), delta AS (
+                SELECT user_id, SUM(amount) AS amount FROM moved GROUP BY user_id
+            )
+            UPDATE {users} AS u
+            SET balance_cached = u.balance_cached + delta.amount
+            FROM delta
+            WHERE u.id = delta.user_id
+            """
+        )
+        return cursor.rowcount
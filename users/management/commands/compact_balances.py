@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.ledger import COMPACT_INTERVAL, compact_balances
+
+
+class Command(BaseCommand):
+    help = "Переносит записи журнала баланса в balance_cached (движок делает это сам, см. run_engine)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Работать постоянно, сжимая раз в --interval секунд")
+        parser.add_argument("--interval", type=float, default=COMPACT_INTERVAL)
+
+    def handle(self, *args, **options):
+        while True:
+            updated = compact_balances()
+            if not options["loop"]:
+                self.stdout.write(f"Обновлено балансов: {updated}")
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2025-09-17 09:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('reason', models.CharField(choices=[('bet', 'Ставка'), ('payout', 'Выплата')], max_length=20)),
+                ('coupon_id', models.BigIntegerField(blank=True, help_text='Купон, к которому относится запись', null=True)),
+                ('is_applied', models.BooleanField(default=False, help_text='Уже учтена в balance_cached')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('is_applied', False)), fields=['user'], name='balance_entry_pending_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2025-09-19 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_balanceentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='balanceentry',
+            name='is_pending',
+            field=models.BooleanField(default=False, help_text='Резерв ставки из очереди приёма: купон ещё не записан (games.utils.bet_queue)'),
+        ),
+        migrations.AddField(
+            model_name='balanceentry',
+            name='round_id',
+            field=models.BigIntegerField(blank=True, help_text='Раунд, к которому относится запись', null=True),
+        ),
+        migrations.AlterField(
+            model_name='balanceentry',
+            name='reason',
+            field=models.CharField(choices=[('bet', 'Ставка'), ('payout', 'Выплата'), ('refund', 'Возврат')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='balanceentry',
+            index=models.Index(condition=models.Q(('is_pending', True)), fields=['round_id'], name='balance_entry_reserved_idx'),
+        ),
+    ]
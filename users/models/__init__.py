@@ -1,2 +1,3 @@
 from .custom_user import CustomUser
-from .color import ColorInterval
\ No newline at end of file
+from .color import ColorInterval
+from .balance_entry import BalanceEntry
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.db import models
+
+
+class BalanceEntry(models.Model):
+    """
+    Запись журнала баланса (только добавление): ставка — отрицательная сумма, выплата — положительная.
+    Текущий баланс = CustomUser.balance_cached + сумма ещё не учтённых записей (is_applied=False).
+    balance_cached — снимок, который периодически догоняет журнал (users.ledger.compact_balances).
+    """
+    class Reason(models.TextChoices):
+        BET = "bet", "Ставка"
+        PAYOUT = "payout", "Выплата"
+        REFUND = "refund", "Возврат"
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="balance_entries")
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    reason = models.CharField(max_length=20, choices=Reason.choices)
+    round_id = models.BigIntegerField(null=True, blank=True, help_text="Раунд, к которому относится запись")
+    coupon_id = models.BigIntegerField(null=True, blank=True, help_text="Купон, к которому относится запись")
+    is_pending = models.BooleanField(
+        default=False,
+        help_text="Резерв ставки из очереди приёма: купон ещё не записан (games.utils.bet_queue)"
+    )
+    is_applied = models.BooleanField(default=False, help_text="Уже учтена в balance_cached")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.get_reason_display()} {self.amount} (user={self.user_id})"
+
+    class Meta:
+        indexes = [
+            # Неучтённые записи пользователя — для текущего баланса и сжатия
+            models.Index(
+                fields=["user"],
+                name="balance_entry_pending_idx",
+                condition=models.Q(is_applied=False),
+            ),
+            # Резервы, ожидающие записи купона — для ожидания очереди перед калькуляцией
+            models.Index(
+                fields=["round_id"],
+                name="balance_entry_reserved_idx",
+                condition=models.Q(is_pending=True),
+            ),
+        ]
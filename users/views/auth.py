@@ -8,6 +8,7 @@ from django.contrib.auth import authenticate, login as auth_login, logout, get_u
 
 from config.utils.jwt_token import get_tokens_for_user
 from config.utils.logging_templates import log_warning, log_info
+from users import ledger
 
 logger = logging.getLogger(__name__)
 
@@ -59,7 +60,7 @@ class UserLoginAPIView(APIView):
                 "last_login": localtime(user.last_login).isoformat() if user.last_login else None,
                 "is_staff": user.is_staff,
                 "is_superuser": user.is_superuser,
-                "balance_cached": user.balance_cached
+                "balance_cached": ledger.get_balance(user.id)
             }
 
             tokens = get_tokens_for_user(user)
@@ -4,15 +4,23 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from users import ledger
+
 User = get_user_model()  # Вот ключевой момент
 
 
 class UserSerializer(serializers.ModelSerializer):
+    # снимок balance_cached + неучтённые записи журнала баланса
+    balance_cached = serializers.SerializerMethodField()
+
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'date_joined',
                   'last_login', 'is_staff', 'is_superuser', 'balance_cached',]
 
+    def get_balance_cached(self, obj):
+        return str(ledger.get_balance(obj.id))
+
 
 class UserProfileAPIView(APIView):
     permission_classes = [IsAuthenticated]  # Только для авторизованных пользователей